@@ -0,0 +1,155 @@
+"""
+Weighted shortest paths: Dijkstra and A*.
+
+Both run on the same graphs as bfs.py, a dict of neighbour lists or a
+CSRGraph. Edge lengths come from weight(node, relatedNode), or from a
+weighted CSRGraph's weights array, and default to 1. A* takes a heuristic
+(node, goal) that must never overestimate the remaining distance, such as
+the straight line distance from euclidean(). Dijkstra is A* with a heuristic
+of 0. The fringe is a binary heap (heapq) and stale entries are skipped
+when they come off it instead of being removed.
+"""
+import heapq
+
+from challenge2 import dist
+from csrgraph import CSRGraph
+
+#Rough middle of every state in states.csv, as (longitude, latitude)
+STATE_CENTERS = {
+    "Alabama": (-86.8, 32.8),
+    "Florida": (-81.7, 28.6),
+    "Georgia": (-83.4, 32.7),
+    "Mississippi": (-89.7, 32.7),
+    "North Carolina": (-79.4, 35.6),
+    "South Carolina": (-80.9, 33.9),
+    "Tennessee": (-86.3, 35.9),
+}
+
+
+#Straight line distance between two nodes with the dist() from challenge2.
+#coords maps a node to its (x, y), a dict or a (nodes x 2) array.
+def euclidean(coords):
+    if hasattr(coords, "tolist"):
+        coords = coords.tolist()
+    def heuristic(node, goal):
+        x1, y1 = coords[node]
+        x2, y2 = coords[goal]
+        return dist(x1, y1, x2, y2)
+    return heuristic
+
+
+#Returns (distance, path) of a shortest path from start to goal, or None if
+#the goal can't be reached. If stats is a dict, stats["expanded"] counts the
+#nodes expanded, and a connectivity index lets hopeless queries return None
+#without searching.
+def astar(graph, start, goal, heuristic=None, weight=None, stats=None, connectivity=None):
+    if connectivity is not None and not connectivity.connected(start, goal):
+        return None
+    if isinstance(graph, CSRGraph):
+        offsets = memoryview(graph.offsets)
+        targets = graph.targets
+        labels = graph.labels
+        if weight is not None:
+            def edges(node):
+                related = targets[offsets[node]:offsets[node + 1]].tolist()
+                return [(other, weight(labels[node], labels[other])) for other in related]
+        elif graph.weights is not None:
+            weights = graph.weights
+            def edges(node):
+                first, last = offsets[node], offsets[node + 1]
+                return zip(targets[first:last].tolist(), weights[first:last].tolist())
+        else:
+            def edges(node):
+                return [(other, 1) for other in targets[offsets[node]:offsets[node + 1]].tolist()]
+        estimate = None
+        if heuristic is not None:
+            goalLabel = labels[graph.idOf(goal)]
+            estimate = lambda node: heuristic(labels[node], goalLabel)
+        found = _search(edges, graph.idOf(start), graph.idOf(goal), estimate, stats)
+        if found is None:
+            return None
+        return found[0], [labels[node] for node in found[1]]
+
+    if weight is None:
+        weight = lambda node, relatedNode: 1
+    def edges(node):
+        return [(relatedNode, weight(node, relatedNode)) for relatedNode in graph.get(node, ())]
+    estimate = None
+    if heuristic is not None:
+        estimate = lambda node: heuristic(node, goal)
+    return _search(edges, start, goal, estimate, stats)
+
+
+def dijkstra(graph, start, goal, weight=None, stats=None, connectivity=None):
+    return astar(graph, start, goal, None, weight, stats, connectivity)
+
+
+def _search(edges, start, goal, estimate, stats):
+    #Best distance found so far and who it came from, for every node seen
+    best = {start: 0}
+    parent = {start: None}
+    #(distance + estimate, distance, node), ties go to the node seen first
+    fringe = [(estimate(start) if estimate else 0, 0, 0, start)]
+    pushed = 1
+    expanded = 0
+    while fringe:
+        guess, distance, order, current = heapq.heappop(fringe)
+        if distance > best[current]:
+            continue
+        if current == goal:
+            break
+        expanded += 1
+        for relatedNode, length in edges(current):
+            newDistance = distance + length
+            if relatedNode not in best or newDistance < best[relatedNode]:
+                best[relatedNode] = newDistance
+                parent[relatedNode] = current
+                guess = newDistance + estimate(relatedNode) if estimate else newDistance
+                heapq.heappush(fringe, (guess, newDistance, pushed, relatedNode))
+                pushed += 1
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    if goal not in best:
+        return None
+    path = [goal]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return best[goal], path
+
+
+#Average nodes expanded per query by BFS (which ignores the weights),
+#Dijkstra and A* with the straight line heuristic on grids of each size
+def compareOnGrids(sizes=(100, 316, 1000), numQueries=5, seed=None):
+    import random
+    import time
+
+    from bfs import bfsShortestPath
+    from graphgen import gridGraph
+
+    rng = random.Random(seed)
+    for size in sizes:
+        graph, coords = gridGraph(size, size, seed=seed)
+        heuristic = euclidean(coords)
+        queries = [(rng.randrange(graph.numNodes), rng.randrange(graph.numNodes)) for query in range(numQueries)]
+        searches = (("bfs", lambda start, goal, stats: bfsShortestPath(graph, start, goal, stats)),
+                    ("dijkstra", lambda start, goal, stats: dijkstra(graph, start, goal, stats=stats)),
+                    ("astar", lambda start, goal, stats: astar(graph, start, goal, heuristic, stats=stats)))
+        for name, search in searches:
+            stats = {}
+            started = time.perf_counter()
+            for start, goal in queries:
+                search(start, goal, stats)
+            print("{0} nodes, {1}: {2:.0f} nodes expanded, {3:.1f} ms per query".format(
+                graph.numNodes, name, stats.get("expanded", 0) / numQueries,
+                (time.perf_counter() - started) / numQueries * 1000))
+
+
+if __name__ == "__main__":
+    #Border map from states.csv, each step as long as the gap between the states
+    borders = CSRGraph.fromCsv("states.csv").toDict()
+    length = euclidean(STATE_CENTERS)
+    print(dijkstra(borders, "Florida", "North Carolina", weight=length))
+    print(astar(borders, "Florida", "North Carolina", length, weight=length))
+
+    compareOnGrids(seed=0)
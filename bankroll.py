@@ -0,0 +1,170 @@
+"""
+Bankroll paths and risk of ruin for betting schemes at the game.py table.
+
+Each hand's result (as a multiple of the bet) is drawn from the outcome
+distribution the simulator measures for a player policy. All paths for all
+schemes advance together one hand at a time as (schemes x paths) NumPy
+arrays, and every scheme sees the same uniform draws for the same path and
+hand (common random numbers), so differences between schemes are not buried
+in noise. Antithetic pairs (u, 1 - u) can cut the variance further.
+
+A bet is never more than the bankroll, but a lost double down costs twice
+the bet, so a hand never loses more than the bits that are left: a path
+that can't cover its double just goes to 0.
+"""
+import numpy as np
+
+from blackjack_engine import STARTING_BITS
+from blackjack_sim import HitBelow, playHands
+
+
+def handOutcomes(policy=None, numHands=1000000, seed=None):
+    #The distinct results of a hand per bit bet and how likely each one is
+    if policy is None:
+        policy = HitBelow()
+    net, busted = playHands(numHands, policy, np.random.default_rng(seed))
+    values, counts = np.unique(net, return_counts=True)
+    return values, counts / counts.sum()
+
+
+class Flat:
+    def __init__(self, bet=100):
+        self.bet = bet
+        self.name = "flat {0}".format(bet)
+
+    def reset(self, numPaths):
+        pass
+
+    def bets(self, bits):
+        return np.full(bits.shape, self.bet)
+
+    def record(self, net):
+        pass
+
+
+class Proportional:
+    #Bets a fixed fraction of the current bits, at least minBet
+    def __init__(self, fraction=0.01, minBet=1):
+        self.fraction = fraction
+        self.minBet = minBet
+        self.name = "proportional {0}".format(fraction)
+
+    def reset(self, numPaths):
+        pass
+
+    def bets(self, bits):
+        return np.maximum(np.floor(bits * self.fraction), self.minBet)
+
+    def record(self, net):
+        pass
+
+
+class Progression:
+    #Multiplies the bet after every loss and goes back to base after a win
+    #(factor 2 is the martingale), never more than maxBet
+    def __init__(self, base=100, factor=2, maxBet=None):
+        self.base = base
+        self.factor = factor
+        self.maxBet = maxBet
+        self.name = "progression {0}x{1}".format(base, factor)
+
+    def reset(self, numPaths):
+        self.current = np.full(numPaths, float(self.base))
+
+    def bets(self, bits):
+        if self.maxBet is None:
+            return self.current
+        return np.minimum(self.current, self.maxBet)
+
+    def record(self, net):
+        self.current = np.where(net < 0, self.current * self.factor,
+                                np.where(net > 0, self.base, self.current))
+
+
+class BankrollResult:
+    def __init__(self, name, finalBits, ruinHand, numHands):
+        self.name = name
+        self.finalBits = finalBits
+        #Hand each path went broke on, -1 if it never did
+        self.ruinHand = ruinHand
+        self.numHands = numHands
+
+    @property
+    def riskOfRuin(self):
+        return float(np.mean(self.ruinHand >= 0))
+
+    @property
+    def meanTimeToRuin(self):
+        ruined = self.ruinHand[self.ruinHand >= 0]
+        return float(ruined.mean()) + 1 if len(ruined) else float("nan")
+
+    def percentiles(self, points=(1, 5, 25, 50, 75, 95, 99)):
+        return dict(zip(points, np.percentile(self.finalBits, points)))
+
+    def __repr__(self):
+        return "{0}: risk of ruin {1:.4f}, mean time to ruin {2:.1f} hands, mean final bits {3:.1f}".format(
+            self.name, self.riskOfRuin, self.meanTimeToRuin, self.finalBits.mean())
+
+
+def analyze(schemes, numPaths=100000, numHands=1000, bits=STARTING_BITS, outcomes=None,
+            minBet=1, seed=None, antithetic=False):
+    #Runs every scheme over the same random numbers and returns a
+    #BankrollResult for each, in the same order as schemes
+    if outcomes is None:
+        outcomes = handOutcomes(seed=seed)
+    values, probabilities = outcomes
+    cumulative = np.cumsum(probabilities)
+    cumulative[-1] = 1.0
+    rng = np.random.default_rng(seed)
+
+    bankroll = np.full((len(schemes), numPaths), float(bits))
+    ruinHand = np.full((len(schemes), numPaths), -1)
+    for scheme in schemes:
+        scheme.reset(numPaths)
+
+    for hand in range(numHands):
+        if antithetic:
+            half = rng.random((numPaths + 1) // 2)
+            uniform = np.concatenate([half, 1.0 - half])[:numPaths]
+        else:
+            uniform = rng.random(numPaths)
+        #Same draw for every scheme on a given path and hand
+        net = values[np.searchsorted(cumulative, uniform, side="right").clip(max=len(values) - 1)]
+
+        alive = ruinHand < 0
+        for row, scheme in enumerate(schemes):
+            bet = np.minimum(scheme.bets(bankroll[row]), bankroll[row]) * alive[row]
+            #A lost double down can't take more than the bankroll
+            result = np.maximum(bet * net, -bankroll[row])
+            bankroll[row] += result
+            scheme.record(result)
+
+        broke = alive & (bankroll < minBet)
+        ruinHand[broke] = hand
+        if not (ruinHand < 0).any():
+            break
+
+    return [BankrollResult(scheme.name, bankroll[row], ruinHand[row], numHands)
+            for row, scheme in enumerate(schemes)]
+
+
+def compare(first, second):
+    #Difference in mean final bits and its standard error, paired by path,
+    #which is where common random numbers pay off
+    difference = second.finalBits - first.finalBits
+    return float(difference.mean()), float(difference.std(ddof=1) / np.sqrt(len(difference)))
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    outcomes = handOutcomes(seed=0)
+    schemes = [Flat(100), Proportional(0.01), Progression(100, 2)]
+    results = analyze(schemes, numPaths=100000, numHands=1000, outcomes=outcomes, seed=1)
+    for result in results:
+        print(result)
+        print("    final bits percentiles:", {point: round(value) for point, value in result.percentiles().items()})
+    for result in results[1:]:
+        print("{0} vs {1}: {2:+.1f} +/- {3:.1f} bits".format(result.name, results[0].name, *compare(results[0], result)))
+    print("Took {0:.1f}s".format(time.perf_counter() - started))
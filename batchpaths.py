@@ -0,0 +1,122 @@
+"""
+Answers big batches of (start, goal) path queries on a process pool.
+
+The graph's CSR arrays are copied once into multiprocessing.shared_memory
+blocks. Every worker attaches to those blocks when it starts and wraps
+them in a read-only CSRGraph, so no task ever pickles the graph: a task is
+just a chunk of query pairs and its answer the chunk's paths. Chunks are
+mapped in order, so the paths come back in the same order as the queries.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bfs import bfsShortestPath, bidirectionalPath
+from csrgraph import CSRGraph
+
+SEARCHES = {"bfs": bfsShortestPath, "bidirectional": bidirectionalPath}
+
+
+class SharedGraph:
+    #Owns the shared memory copy of a CSRGraph's arrays. spec is the small
+    #picklable description attachGraph() needs, and close() frees the
+    #blocks, so use it in a with block.
+    def __init__(self, graph):
+        self.blocks = []
+        arrays = {}
+        for name in ("offsets", "targets", "weights"):
+            array = getattr(graph, name)
+            if array is None:
+                continue
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self.blocks.append(block)
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            arrays[name] = (block.name, array.shape, array.dtype.str)
+        self.spec = (arrays, graph.labels)
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attachGraph(spec):
+    #Returns a CSRGraph over the shared blocks and the blocks themselves,
+    #which have to stay open as long as the graph is used
+    arrays, labels = spec
+    blocks = []
+    views = {"weights": None}
+    for name, (blockName, shape, dtype) in arrays.items():
+        block = shared_memory.SharedMemory(name=blockName)
+        blocks.append(block)
+        view = np.ndarray(shape, dtype, buffer=block.buf)
+        view.setflags(write=False)
+        views[name] = view
+    return CSRGraph(views["offsets"], views["targets"], labels, views["weights"]), blocks
+
+
+#Set once in every worker by _startWorker
+_graph = None
+_blocks = None
+_search = None
+
+
+def _startWorker(spec, method):
+    global _graph, _blocks, _search
+    _graph, _blocks = attachGraph(spec)
+    _search = SEARCHES[method]
+
+
+def _answerChunk(queries):
+    return [_search(_graph, start, goal) for start, goal in queries]
+
+
+#Returns the shortest path (or None) for every (start, goal) pair in
+#queries, in the same order. method is "bfs", or "bidirectional" for
+#undirected graphs.
+def batchPaths(graph, queries, workers=None, chunkSize=1000, method="bfs"):
+    if method not in SEARCHES:
+        raise ValueError("method must be one of {0}".format(sorted(SEARCHES)))
+    if not isinstance(graph, CSRGraph):
+        graph = CSRGraph.fromDict(graph)
+    queries = list(queries)
+    chunks = [queries[first:first + chunkSize] for first in range(0, len(queries), chunkSize)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers == 1:
+        search = SEARCHES[method]
+        return [search(graph, start, goal) for chunk in chunks for start, goal in chunk]
+    with SharedGraph(graph) as shared, ProcessPoolExecutor(
+            workers, initializer=_startWorker, initargs=(shared.spec, method)) as pool:
+        return [path for paths in pool.map(_answerChunk, chunks) for path in paths]
+
+
+if __name__ == "__main__":
+    import time
+
+    from graphgen import randomGraph
+
+    graph = randomGraph(1000000, 20, seed=0)
+    rng = np.random.default_rng(0)
+    queries = rng.integers(0, graph.numNodes, (20000, 2))
+
+    expected = None
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        started = time.perf_counter()
+        paths = batchPaths(graph, queries, workers, method="bidirectional")
+        seconds = time.perf_counter() - started
+        lengths = [None if path is None else len(path) for path in paths]
+        if expected is None:
+            expected = lengths
+        assert lengths == expected
+        print("{0} workers: {1:.0f} queries per second".format(workers, len(queries) / seconds))
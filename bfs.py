@@ -1,4 +1,6 @@
 import random 
+import time
+from array import array
 from collections import deque
 
 graph = {
@@ -14,10 +16,20 @@ graph = {
 }
 
 
+#True for a csrgraph.CSRGraph. Checked by its arrays rather than with
+#isinstance, so the dict searches don't need to import csrgraph and numpy.
+def _isCsr(graph):
+    return hasattr(graph, "offsets") and hasattr(graph, "targets")
+
+
 #Params Graph in Dictionary
 #Start is the start
 #Goal is the end
-def bfsFindPath(graph, start, goal):
+#Connectivity is an optional connectivity.Connectivity index, if it says the
+#goal can't be reached we return None without searching
+def bfsFindPath(graph, start, goal, connectivity=None):
+    if connectivity is not None and not connectivity.connected(start, goal):
+        return None
     #The Path So Far
     path_so_far = [start]
     #Visited is where we have been to
@@ -47,14 +59,188 @@ def bfsFindPath(graph, start, goal):
             #Return the shortest path to reach the goal
             return path_so_far
 
+#Walk the parent pointers back from goal to start
+def tracePath(parent, goal):
+    path = [goal]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+
+#Same answer as bfsFindPath, but each node only remembers who found it
+#instead of carrying a copy of its whole path, nodes are marked visited when
+#they are queued so they are never queued twice, the search stops as soon as
+#the goal is found and it returns None when the goal can't be reached.
+#If stats is a dict, stats["expanded"] counts the nodes expanded, and a
+#connectivity index lets hopeless queries return None straight away.
+def bfsShortestPath(graph, start, goal, stats=None, connectivity=None):
+    if start == goal:
+        return [start]
+    if connectivity is not None and not connectivity.connected(start, goal):
+        return None
+    if _isCsr(graph):
+        path = _bfsIds(graph, graph.idOf(start), graph.idOf(goal), stats)
+        return None if path is None else [graph.labelOf(node) for node in path]
+
+    #Parent of every node that has been queued, doubles as the visited set
+    parent = {start: None}
+    fringe = deque([start])
+    expanded = 0
+    try:
+        while fringe:
+            current = fringe.popleft()
+            expanded += 1
+            for relatedNode in graph[current]:
+                if relatedNode not in parent:
+                    parent[relatedNode] = current
+                    if relatedNode == goal:
+                        return tracePath(parent, goal)
+                    fringe.append(relatedNode)
+        return None
+    finally:
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanded
+
+
+#The same search on integer ids with a 4 byte per node parent array,
+#-1 means not visited
+def _bfsIds(graph, start, goal, stats=None):
+    parent = array("i", [-1]) * graph.numNodes
+    parent[start] = start
+    offsets = graph.offsets
+    targets = graph.targets
+    fringe = deque([start])
+    expanded = 0
+    try:
+        while fringe:
+            current = fringe.popleft()
+            expanded += 1
+            for relatedNode in targets[offsets[current]:offsets[current + 1]].tolist():
+                if parent[relatedNode] < 0:
+                    parent[relatedNode] = current
+                    if relatedNode == goal:
+                        path = [goal]
+                        while path[-1] != start:
+                            path.append(parent[path[-1]])
+                        path.reverse()
+                        return path
+                    fringe.append(relatedNode)
+        return None
+    finally:
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanded
+
+
+#Searches from both ends at once and stops where they meet. Each round
+#expands a whole level of whichever frontier is smaller, so on graphs with
+#a big branching factor both searches stay around b^(d/2) nodes instead of
+#b^d. The graph has to be undirected (every edge listed both ways), because
+#the search from the goal follows edges backwards. Returns the same length
+#of path as bfsShortestPath, or None.
+def bidirectionalPath(graph, start, goal, stats=None, connectivity=None):
+    if start == goal:
+        return [start]
+    if connectivity is not None and not connectivity.connected(start, goal):
+        return None
+    if _isCsr(graph):
+        offsets = graph.offsets
+        targets = graph.targets
+        neighbors = lambda node: targets[offsets[node]:offsets[node + 1]].tolist()
+        path = _bidirectional(neighbors, graph.idOf(start), graph.idOf(goal), stats)
+        return None if path is None else [graph.labelOf(node) for node in path]
+    if start not in graph or goal not in graph:
+        return None
+    return _bidirectional(graph.__getitem__, start, goal, stats)
+
+
+def _bidirectional(neighbors, start, goal, stats):
+    #Parent pointers from each side, they double as the visited sets
+    forward = {start: None}
+    backward = {goal: None}
+    forwardFringe = [start]
+    backwardFringe = [goal]
+    expanded = 0
+    meet = None
+    while forwardFringe and backwardFringe and meet is None:
+        if len(forwardFringe) <= len(backwardFringe):
+            fringe, parent, other = forwardFringe, forward, backward
+        else:
+            fringe, parent, other = backwardFringe, backward, forward
+
+        #Expand the whole level. The first node the other side has seen
+        #gives a shortest path, since every meeting on this level is the
+        #same length.
+        nextFringe = []
+        for current in fringe:
+            expanded += 1
+            for relatedNode in neighbors(current):
+                if relatedNode not in parent:
+                    parent[relatedNode] = current
+                    if relatedNode in other:
+                        meet = relatedNode
+                        break
+                    nextFringe.append(relatedNode)
+            if meet is not None:
+                break
+
+        if parent is forward:
+            forwardFringe = nextFringe
+        else:
+            backwardFringe = nextFringe
+
+    if stats is not None:
+        stats["expanded"] = stats.get("expanded", 0) + expanded
+    if meet is None:
+        return None
+    path = tracePath(forward, meet)
+    node = backward[meet]
+    while node is not None:
+        path.append(node)
+        node = backward[node]
+    return path
+
+
+#Runs the same random (start, goal) queries through both searches and
+#reports the average node expansions and time per query
+def compareSearches(graph, numQueries=100, seed=None):
+    rng = random.Random(seed)
+    keys = list(graph.keys())
+    queries = [(rng.choice(keys), rng.choice(keys)) for query in range(numQueries)]
+    report = {}
+    for search in (bfsShortestPath, bidirectionalPath):
+        stats = {}
+        started = time.perf_counter()
+        lengths = [len(path) if path else None for path in
+                   (search(graph, start, goal, stats) for start, goal in queries)]
+        report[search.__name__] = {
+            "expandedPerQuery": stats.get("expanded", 0) / numQueries,
+            "secondsPerQuery": (time.perf_counter() - started) / numQueries,
+            "lengths": lengths,
+        }
+    return report
+
+
 #Code used to generate random stuff
-start = random.randint(0, len(graph) - 1)
-goal = random.randint(0, len(graph) - 1)
-while goal == start:
+if __name__ == "__main__":
+    start = random.randint(0, len(graph) - 1)
     goal = random.randint(0, len(graph) - 1)
+    while goal == start:
+        goal = random.randint(0, len(graph) - 1)
+
+    keys = list(graph.keys())
+    path = bfsShortestPath(graph, keys[start], keys[goal])
+    print(path)
 
-keys = list(graph.keys())
-path = bfsFindPath(graph, keys[start], keys[goal])
-print(path)
+    if path is None:
+        print("There is no way to get from {0} to {1}".format(keys[start], keys[goal]))
+    else:
+        print("It took {0} steps to get from {1} to {2}".format(len(path) - 1, keys[start], keys[goal]))
 
-print("It took {0} steps to get from {1} to {2}".format(len(path) - 1, keys[start], keys[goal]))
\ No newline at end of file
+    #Now the same kind of queries on a much bigger graph
+    from graphgen import randomGraph
+    report = compareSearches(randomGraph(100000, 20, seed=0), 50, seed=0)
+    assert report["bfsShortestPath"]["lengths"] == report["bidirectionalPath"]["lengths"]
+    for name, result in report.items():
+        print("{0}: {1:.0f} nodes expanded, {2:.2f} ms per query".format(
+            name, result["expandedPerQuery"], result["secondsPerQuery"] * 1000))
\ No newline at end of file
@@ -0,0 +1,285 @@
+"""
+The blackjack rules from game.py as an importable engine.
+
+BlackjackEngine deals from a Shoe, asks a policy what to do and settles the
+bet exactly the way game.py does. It never prints or sleeps by itself; give
+it a renderer (like ConsoleRenderer) to watch a game, or leave it out for a
+fast headless engine in tests and batch runs.
+
+A policy is any callable policy(playerHand, dealerCard) returning HIT, STAND
+or DOUBLE. A round can also be driven one step at a time with deal(), act(),
+dealerPlay() and settle().
+"""
+import time
+
+from highscores import HighScores
+from shoe import Shoe, GAME_SUIT
+
+# Same numbers as the menu in game.py
+HIT = 1
+STAND = 2
+DOUBLE = 3
+
+DEALER_STANDS_ON = 16
+BLACKJACK_BONUS = 1.5
+STARTING_BITS = 10000
+
+
+def displayScore(hand):
+    score = 0
+    for card in hand:
+        score += card
+    return score
+
+
+def checkScore(hand):
+    #True if the hand is bust
+    return displayScore(hand) > 21
+
+
+def payout(playerHand, dealerHand, bet, playerBusted):
+    #Bits paid back at the end of a round, the bet itself was already taken.
+    #A dealer bust is looked at first, just like game.py.
+    dealerScore = displayScore(dealerHand)
+    if dealerScore > 21:
+        return bet * 2
+    elif playerBusted:
+        return 0
+    elif dealerScore < displayScore(playerHand):
+        return bet * 2
+    elif dealerScore > displayScore(playerHand):
+        return 0
+    else:
+        return bet
+
+
+class BlackjackEngine:
+    #policy is called as policy(playerHand, dealerCard) for every decision
+    #renderer gets told what happens, None runs without any output
+    #blackjackBonus multiplies the bet on a blackjack, None turns that off
+    def __init__(self, policy=None, renderer=None, shoe=None, bits=STARTING_BITS,
+                 suit=GAME_SUIT, blackjackBonus=BLACKJACK_BONUS, dealerStandsOn=DEALER_STANDS_ON):
+        self.policy = policy
+        self.renderer = renderer
+        self.shoe = shoe if shoe is not None else Shoe(suit=suit)
+        self.bits = bits
+        self.blackjackBonus = blackjackBonus
+        self.dealerStandsOn = dealerStandsOn
+        self.playerHand = []
+        self.dealerHand = []
+        self.bet = 0
+        self.inGame = False
+        self.playerBusted = False
+
+    def drawCard(self):
+        return self.shoe.drawCard()
+
+    def drawHand(self, numPlayers):
+        #Two cards each for numPlayers players
+        return [[self.drawCard(), self.drawCard()] for player in range(numPlayers)]
+
+    def deal(self, bet, playerHand=None, dealerHand=None):
+        #Takes the bet and deals a new round. A table with several seats can
+        #pass in hands it already dealt, sharing one dealerHand between them.
+        if bet > self.bits or bet < 0:
+            raise ValueError("Invalid bet")
+        self.bits -= bet
+        self.bet = bet
+        self.playerBusted = False
+        self.inGame = True
+
+        if playerHand is None:
+            if self.shoe.needsShuffle():
+                self.shoe.shuffle()
+            playerCard1 = self.drawCard()
+            dealerCard1 = self.drawCard()
+            playerCard2 = self.drawCard()
+            dealerCard2 = self.drawCard()
+            playerHand = [playerCard1, playerCard2]
+            dealerHand = [dealerCard1, dealerCard2]
+        self.playerHand = playerHand
+        self.dealerHand = dealerHand
+
+        if self.renderer:
+            self.renderer.hidden(self.dealerHand[0], self.playerHand)
+
+        if self.blackjackBonus and displayScore(self.playerHand) == 21:
+            self.inGame = False
+            self.bet = self.bet * self.blackjackBonus
+            if self.renderer:
+                self.renderer.message("You got blackjack")
+
+    def canDouble(self):
+        return self.inGame and self.bet <= self.bits and len(self.playerHand) == 2
+
+    def act(self, choice):
+        #Plays one player decision, anything unknown stands like game.py.
+        #Returns False if a double down was not allowed.
+        if choice == HIT or choice == DOUBLE:
+            if choice == DOUBLE:
+                if not self.canDouble():
+                    if self.renderer:
+                        self.renderer.message("You don't have enough bits or you already hit")
+                    return False
+                self.bits -= self.bet
+                self.bet = self.bet * 2
+                self.inGame = False
+
+            self.playerHand.append(self.drawCard())
+            if self.renderer:
+                self.renderer.hidden(self.dealerHand[0], self.playerHand)
+
+            if checkScore(self.playerHand):
+                self.inGame = False
+                self.playerBusted = True
+        else:
+            self.inGame = False
+        return True
+
+    def dealerPlay(self):
+        if self.renderer and displayScore(self.dealerHand) >= self.dealerStandsOn:
+            self.renderer.revealed(self.playerHand, self.dealerHand)
+
+        if not self.playerBusted:
+            while displayScore(self.dealerHand) < self.dealerStandsOn:
+                self.dealerHand.append(self.drawCard())
+                if self.renderer:
+                    self.renderer.dealerHit(self.playerHand, self.dealerHand)
+
+    def settle(self):
+        #Pays the round out and returns the bits won
+        won = payout(self.playerHand, self.dealerHand, self.bet, self.playerBusted)
+        self.bits += won
+        if self.renderer:
+            if displayScore(self.dealerHand) > 21:
+                self.renderer.message("The dealer busts. You win")
+            elif self.playerBusted:
+                self.renderer.message("You busted")
+            elif won > self.bet:
+                self.renderer.message("You win")
+            elif won < self.bet:
+                self.renderer.message("You lose")
+            else:
+                self.renderer.message("It's a draw")
+
+            if won > self.bet:
+                self.renderer.message("You won {0} bits".format(won))
+            elif won < self.bet:
+                self.renderer.message("You lost {0} bits".format(self.bet))
+        return won
+
+    def playRound(self, bet, askAgain=False):
+        #Plays a whole round with the policy and returns the net change in bits.
+        #A double down that isn't allowed stands, like blackjack_sim.py, so a
+        #policy that keeps asking can't hang the round. askAgain asks the
+        #policy again instead, the way game.py re-prompts at the keyboard.
+        before = self.bits
+        self.deal(bet)
+        while self.inGame:
+            if not self.act(self.policy(self.playerHand, self.dealerHand[0])) and not askAgain:
+                self.act(STAND)
+        self.dealerPlay()
+        self.settle()
+        return self.bits - before
+
+
+class ConsoleRenderer:
+    #Prints a game the way game.py always has, pausing while the dealer draws
+    def __init__(self, delay=1):
+        self.delay = delay
+
+    def printHand(self, hand):
+        for card in hand:
+            print(card)
+
+    def hidden(self, dealerCard1, playerHand):
+        print("Dealer's hand: ")
+        print(dealerCard1)
+        print("[ ]")
+
+        print("\n")
+
+        print("Your hand: ")
+        self.printHand(playerHand)
+        print("Score: " + str(displayScore(playerHand)))
+
+    def printAll(self, playerHand, dealerHand):
+        print("Dealer's hand: ")
+        self.printHand(dealerHand)
+        print("Score: " + str(displayScore(dealerHand)))
+
+        print("\n")
+
+        print("Your hand: ")
+        self.printHand(playerHand)
+        print("Score: " + str(displayScore(playerHand)))
+
+    def revealed(self, playerHand, dealerHand):
+        print("\n")
+        time.sleep(self.delay)
+        self.printAll(playerHand, dealerHand)
+
+    def dealerHit(self, playerHand, dealerHand):
+        print("")
+        time.sleep(self.delay)
+        print("The dealer hit")
+        print("")
+        self.printAll(playerHand, dealerHand)
+
+    def message(self, text):
+        print("")
+        print(text)
+
+
+def consolePolicy(playerHand, dealerCard):
+    #Asks the player at the keyboard
+    print("\n")
+    print("1. Hit")
+    print("2. Stand")
+    print("3. Double down")
+    try:
+        choice = int(input())
+    except ValueError:
+        print("Invalid Input. You lose as punishment")
+        choice = STAND
+    print("\n")
+    return choice
+
+
+def playConsole(engine, highscorePath="highscores.db"):
+    #The interactive loop game.py and real.py run
+    while engine.bits > 0:
+        print("\n")
+        print("Do you want to save your score (y/n) Score: " + str(engine.bits))
+
+        quit = input()
+        if (quit == "y"):
+            print("")
+            print("What is your name?")
+            name = input()
+            with HighScores(highscorePath) as highscores:
+                highscores.add(name, engine.bits)
+                print("\n")
+                print("Highscore:")
+                for savedName, score in highscores.top(10):
+                    if score == int(score):
+                        score = int(score)
+                    print(" {0}, score: {1}".format(savedName, score))
+            break
+
+        print("\n")
+        bet = -1
+        while bet > engine.bits or bet < 0:
+            print("Bits: " + str(engine.bits))
+            print("How many bits do you want to bet?")
+            try:
+                bet = int(input())
+            except ValueError:
+                print("Invalid Input")
+
+            print("\n")
+
+            if(bet > engine.bits or bet < 0):
+                print("Invalid bet")
+
+        engine.playRound(bet, askAgain=True)
@@ -0,0 +1,90 @@
+"""
+Load test for blackjack_server.py.
+
+Opens many concurrent sessions, has each play a few rounds (hit below 16,
+then stand) and reports how long the server took to answer each HIT, the
+one action it answers straight away. BET waits for the deal and STAND for
+the other seats to finish, so those are reported as the time a whole round
+took, from BET to RESULT.
+
+Run the server first, then: python blackjack_loadtest.py [sessions] [rounds] [port]
+"""
+import asyncio
+import sys
+import time
+
+from blackjack_server import raiseFileLimit
+
+
+async def request(reader, writer, line, latencies=None):
+    started = time.perf_counter()
+    writer.write((line + "\n").encode())
+    await writer.drain()
+    reply = (await reader.readline()).decode().split()
+    if latencies is not None:
+        latencies.append(time.perf_counter() - started)
+    return reply
+
+
+async def session(host, port, rounds, latencies, roundTimes, connecting):
+    async with connecting:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await reader.readline()
+        for round in range(rounds):
+            started = time.perf_counter()
+            reply = await request(reader, writer, "BET 1")
+            if reply[0] != "DEAL":
+                break
+            total = int(reply[3])
+            while total < 16:
+                reply = await request(reader, writer, "HIT", latencies)
+                total = int(reply[2])
+            #A blackjack or a bust after a hit just waits for RESULT, but two
+            #aces are dealt as 22 and still have to stand
+            if (reply[0] == "DEAL" and total == 21) or (reply[0] == "CARD" and total > 21):
+                await reader.readline()
+            else:
+                #STAND is answered by the round's RESULT
+                await request(reader, writer, "STAND")
+            roundTimes.append(time.perf_counter() - started)
+        writer.write(b"QUIT\n")
+        await writer.drain()
+        await reader.readline()
+    finally:
+        writer.close()
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def loadTest(sessions=10000, rounds=5, host="127.0.0.1", port=8888, maxConnecting=500):
+    latencies = []
+    roundTimes = []
+    connecting = asyncio.Semaphore(maxConnecting)
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(session(host, port, rounds, latencies, roundTimes, connecting) for i in range(sessions)),
+        return_exceptions=True)
+    seconds = time.perf_counter() - started
+    failures = sum(1 for result in results if isinstance(result, Exception))
+
+    latencies.sort()
+    roundTimes.sort()
+    print("Sessions: {0} ({1} failed)".format(sessions, failures))
+    print("Rounds: {0} in {1:.1f}s ({2:.0f}/s)".format(len(roundTimes), seconds, len(roundTimes) / seconds))
+    if latencies:
+        print("HIT p50: {0:.2f} ms, p99: {1:.2f} ms ({2} hits)".format(
+            percentile(latencies, 0.50) * 1000, percentile(latencies, 0.99) * 1000, len(latencies)))
+    if roundTimes:
+        print("Round p50: {0:.1f} ms, p99: {1:.1f} ms".format(
+            percentile(roundTimes, 0.50) * 1000, percentile(roundTimes, 0.99) * 1000))
+
+
+if __name__ == "__main__":
+    raiseFileLimit()
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    port = int(sys.argv[3]) if len(sys.argv) > 3 else 8888
+    asyncio.run(loadTest(sessions, rounds, port=port))
@@ -0,0 +1,250 @@
+"""
+Multi-table blackjack over TCP with asyncio.
+
+Every table has its own shoe and up to seatsPerTable seats, and every seat
+has its own BlackjackEngine (so its own bits) dealing from the table's shoe.
+Clients talk one line at a time:
+
+    BET <bits>              -> DEAL <cards> <dealer card> <total>
+    HIT / DOUBLE            -> CARD <card> <total>
+    STAND                   (nothing until the round ends)
+    SAVE <name>             -> OK
+    QUIT                    -> BYE
+
+When every seat in the round has finished, the dealer plays and every seat
+gets RESULT <bits won> <bits> <dealer cards>. Anything wrong gets ERR <why>.
+Nothing here sleeps or blocks: high scores are written on a worker thread.
+
+Run it with: python blackjack_server.py [port]
+"""
+import asyncio
+import resource
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from blackjack_engine import BlackjackEngine, HIT, STAND, DOUBLE, DEALER_STANDS_ON, STARTING_BITS, displayScore
+from highscores import HighScores
+from shoe import Shoe
+
+COMMANDS = {"HIT": HIT, "STAND": STAND, "DOUBLE": DOUBLE}
+
+
+def raiseFileLimit():
+    #Every session is a socket, so lift the soft limit as far as it goes
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def cardList(hand):
+    return ",".join(str(card) for card in hand)
+
+
+class Seat:
+    def __init__(self, table, writer, bits):
+        self.table = table
+        self.writer = writer
+        self.engine = BlackjackEngine(shoe=table.shoe, bits=bits)
+        #Bet waiting for the next deal, and whether we are in this round
+        self.bet = None
+        self.playing = False
+
+    def send(self, line):
+        if not self.writer.is_closing():
+            self.writer.write((line + "\n").encode())
+
+
+class Table:
+    #betWindow is how long a round waits for the other seats to bet
+    #actionTimeout stands anyone who has not finished in time
+    def __init__(self, tableId, numDecks=6, seatsPerTable=5, betWindow=0.5, actionTimeout=30.0):
+        self.tableId = tableId
+        self.shoe = Shoe(numDecks)
+        self.seatsPerTable = seatsPerTable
+        self.betWindow = betWindow
+        self.actionTimeout = actionTimeout
+        self.seats = []
+        self.dealerHand = []
+        self.inRound = False
+        self.dealTimer = None
+        self.actionTimer = None
+
+    def isFull(self):
+        return len(self.seats) >= self.seatsPerTable
+
+    def sit(self, writer, bits=STARTING_BITS):
+        seat = Seat(self, writer, bits)
+        self.seats.append(seat)
+        return seat
+
+    def leave(self, seat):
+        #Anything already bet on a hand in play is lost
+        self.seats.remove(seat)
+        seat.playing = False
+        if self.inRound:
+            self.checkDone()
+        elif not any(other.bet is not None for other in self.seats) and self.dealTimer:
+            self.dealTimer.cancel()
+            self.dealTimer = None
+
+    def placeBet(self, seat, bet):
+        if seat.playing:
+            return seat.send("ERR Round in progress")
+        if bet <= 0 or bet > seat.engine.bits:
+            return seat.send("ERR Invalid bet")
+        seat.bet = bet
+        if self.inRound:
+            return
+        if all(other.bet is not None for other in self.seats):
+            self.deal()
+        elif self.dealTimer is None:
+            self.dealTimer = asyncio.get_running_loop().call_later(self.betWindow, self.deal)
+
+    def deal(self):
+        if self.dealTimer:
+            self.dealTimer.cancel()
+            self.dealTimer = None
+        players = [seat for seat in self.seats if seat.bet is not None]
+        if not players:
+            return
+        if self.shoe.needsShuffle():
+            self.shoe.shuffle()
+
+        #One hand per seat and the last one for the dealer
+        hands = players[0].engine.drawHand(len(players) + 1)
+        self.dealerHand = hands.pop()
+        self.inRound = True
+        for seat, hand in zip(players, hands):
+            seat.engine.deal(seat.bet, hand, self.dealerHand)
+            seat.bet = None
+            seat.playing = True
+            seat.send("DEAL {0} {1} {2}".format(cardList(hand), self.dealerHand[0], displayScore(hand)))
+
+        self.actionTimer = asyncio.get_running_loop().call_later(self.actionTimeout, self.standAll)
+        self.checkDone()
+
+    def act(self, seat, choice):
+        engine = seat.engine
+        if not seat.playing or not engine.inGame:
+            return seat.send("ERR Not your turn")
+        if not engine.act(choice):
+            return seat.send("ERR You don't have enough bits or you already hit")
+        if choice != STAND:
+            seat.send("CARD {0} {1}".format(engine.playerHand[-1], displayScore(engine.playerHand)))
+        self.checkDone()
+
+    def standAll(self):
+        for seat in self.seats:
+            if seat.playing and seat.engine.inGame:
+                seat.engine.act(STAND)
+        self.checkDone()
+
+    def checkDone(self):
+        playing = [seat for seat in self.seats if seat.playing]
+        if any(seat.engine.inGame for seat in playing):
+            return
+        if self.actionTimer:
+            self.actionTimer.cancel()
+            self.actionTimer = None
+
+        #The dealer only draws if somebody is still standing
+        if any(not seat.engine.playerBusted for seat in playing):
+            while displayScore(self.dealerHand) < DEALER_STANDS_ON:
+                self.dealerHand.append(self.shoe.drawCard())
+
+        for seat in playing:
+            won = seat.engine.settle()
+            seat.playing = False
+            seat.send("RESULT {0} {1} {2}".format(won, seat.engine.bits, cardList(self.dealerHand)))
+        self.inRound = False
+
+        #Bets placed during the round go into the next one
+        if any(seat.bet is not None for seat in self.seats):
+            self.dealTimer = asyncio.get_running_loop().call_later(self.betWindow, self.deal)
+
+
+class BlackjackServer:
+    def __init__(self, highscorePath="highscores.db", **tableOptions):
+        self.highscorePath = highscorePath
+        self.tableOptions = tableOptions
+        self.tables = {}
+        self.openTables = []
+        self.nextTableId = 0
+        #SQLite connections belong to one thread, so one writer thread owns it
+        self.saver = ThreadPoolExecutor(1)
+        self.saverLocal = threading.local()
+
+    def _saveScore(self, name, score):
+        if not hasattr(self.saverLocal, "highscores"):
+            self.saverLocal.highscores = HighScores(self.highscorePath)
+        self.saverLocal.highscores.add(name, score)
+
+    def join(self, writer):
+        while self.openTables and self.openTables[-1].isFull():
+            self.openTables.pop()
+        if self.openTables:
+            table = self.openTables[-1]
+        else:
+            table = Table(self.nextTableId, **self.tableOptions)
+            self.tables[table.tableId] = table
+            self.openTables.append(table)
+            self.nextTableId += 1
+        return table, table.sit(writer)
+
+    def leave(self, table, seat):
+        table.leave(seat)
+        if not table.seats:
+            del self.tables[table.tableId]
+            if table in self.openTables:
+                self.openTables.remove(table)
+        elif table not in self.openTables:
+            self.openTables.append(table)
+
+    async def handleClient(self, reader, writer):
+        table, seat = self.join(writer)
+        seat.send("WELCOME {0} {1}".format(table.tableId, seat.engine.bits))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode(errors="replace").split()
+                if not words:
+                    continue
+                command = words[0].upper()
+
+                if command == "BET":
+                    try:
+                        table.placeBet(seat, int(words[1]))
+                    except (IndexError, ValueError):
+                        seat.send("ERR Invalid bet")
+                elif command in COMMANDS:
+                    table.act(seat, COMMANDS[command])
+                elif command == "SAVE" and len(words) > 1:
+                    name = " ".join(words[1:])
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(self.saver, self._saveScore, name, seat.engine.bits)
+                    seat.send("OK")
+                elif command == "QUIT":
+                    seat.send("BYE")
+                    break
+                else:
+                    seat.send("ERR Unknown command")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.leave(table, seat)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8888, backlog=4096):
+        server = await asyncio.start_server(self.handleClient, host, port, backlog=backlog)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8888
+    raiseFileLimit()
+    asyncio.run(BlackjackServer().serve(port=port))
@@ -0,0 +1,224 @@
+"""
+Headless Monte Carlo simulator for the game.py rules.
+
+Plays big batches of hands at once with NumPy arrays instead of one hand at a
+time through input(). Every hand gets its own freshly shuffled shoe, which is
+tracked as a column of card counts so cards are drawn without replacement.
+
+The rules are the ones game.py plays:
+  - the player and the dealer get two cards each, dealt player first
+  - 21 on the first two cards is a blackjack and the bet becomes 1.5x
+  - the player may hit, stand or double down, but only double on two cards
+  - the dealer hits below 16
+  - a dealer bust pays before a player bust is looked at
+
+Results are the net change in bits per 1 bit bet, exactly as game.py settles
+them (so a winning blackjack nets +2 and a pushed one +0.5).
+"""
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from blackjack_engine import BlackjackEngine, HIT, STAND, DOUBLE, DEALER_STANDS_ON, BLACKJACK_BONUS
+from shoe import Shoe, GAME_SUIT
+
+
+class HitBelow:
+    #Hit until the total reaches threshold, never double.
+    #A class rather than a closure so it can be sent to worker processes.
+    def __init__(self, threshold=DEALER_STANDS_ON):
+        self.threshold = threshold
+
+    def __call__(self, total, upcard, numCards):
+        return np.where(total < self.threshold, HIT, STAND)
+
+
+class SimResult:
+    #Running sums for a batch of hands, so partial results can be merged
+    def __init__(self, hands=0, total=0.0, totalSq=0.0, busts=0, seconds=0.0):
+        self.hands = hands
+        self.total = total
+        self.totalSq = totalSq
+        self.busts = busts
+        self.seconds = seconds
+
+    def add(self, net, busted):
+        self.hands += len(net)
+        self.total += float(net.sum())
+        self.totalSq += float(np.square(net).sum())
+        self.busts += int(busted.sum())
+
+    def merge(self, other):
+        self.hands += other.hands
+        self.total += other.total
+        self.totalSq += other.totalSq
+        self.busts += other.busts
+        self.seconds += other.seconds
+        return self
+
+    @property
+    def ev(self):
+        return self.total / self.hands
+
+    @property
+    def variance(self):
+        return self.totalSq / self.hands - self.ev ** 2
+
+    @property
+    def bustRate(self):
+        return self.busts / self.hands
+
+    @property
+    def handsPerSecond(self):
+        return self.hands / self.seconds if self.seconds else float("inf")
+
+    def __repr__(self):
+        return ("SimResult(hands={0}, ev={1:.5f}, variance={2:.5f}, bustRate={3:.5f}, "
+                "handsPerSecond={4:.0f})").format(
+                    self.hands, self.ev, self.variance, self.bustRate, self.handsPerSecond)
+
+
+def deckCounts(suit=GAME_SUIT, numDecks=1):
+    #The distinct card values of a shoe and how many of each it holds
+    values, counts = np.unique(np.array(suit * 4 * numDecks), return_counts=True)
+    return values, counts
+
+
+def playHands(numHands, policy, rng, numDecks=1, suit=GAME_SUIT):
+    #Plays numHands independent hands and returns (net, busted) arrays.
+    #policy(total, upcard, numCards) gets arrays for the hands still deciding
+    #and returns an array of HIT, STAND or DOUBLE.
+    values, perShoe = deckCounts(suit, numDecks)
+    #One row per card value and one column per hand, so walking the values
+    #for a whole batch of hands stays on contiguous memory
+    counts = np.repeat(perShoe.astype(np.int16)[:, None], numHands, axis=1)
+    flatCounts = counts.reshape(-1)
+    remaining = np.full(numHands, perShoe.sum(), dtype=np.int16)
+
+    def draw(rows):
+        left = remaining[rows]
+        pick = (rng.random(len(rows)) * left).astype(np.int16)
+        seen = np.zeros(len(rows), dtype=np.int16)
+        card = np.zeros(len(rows), dtype=np.intp)
+        for value in range(len(values) - 1):
+            seen += counts[value, rows]
+            card += seen <= pick
+        flatCounts[card * numHands + rows] -= 1
+        remaining[rows] = left - 1
+        return values[card]
+
+    everyone = np.arange(numHands)
+    player = draw(everyone)
+    upcard = draw(everyone)
+    player += draw(everyone)
+    dealer = upcard + draw(everyone)
+    numCards = np.full(numHands, 2, dtype=np.int8)
+
+    blackjack = player == 21
+    stake = np.ones(numHands)
+    busted = np.zeros(numHands, dtype=bool)
+
+    #Player decisions, only for the hands still in the game
+    deciding = np.flatnonzero(~blackjack)
+    while len(deciding):
+        action = policy(player[deciding], upcard[deciding], numCards[deciding])
+        double = (action == DOUBLE) & (numCards[deciding] == 2)
+        hitting = deciding[(action == HIT) | double]
+        stake[deciding[double]] = 2.0
+
+        player[hitting] += draw(hitting)
+        numCards[hitting] += 1
+        busted[hitting] = player[hitting] > 21
+
+        #Anyone who stood, doubled or busted is done
+        deciding = hitting[(~busted[hitting]) & (stake[hitting] == 1.0)]
+
+    #The dealer only plays when the player is still standing
+    hitting = np.flatnonzero(~busted & (dealer < DEALER_STANDS_ON))
+    while len(hitting):
+        dealer[hitting] += draw(hitting)
+        hitting = hitting[dealer[hitting] < DEALER_STANDS_ON]
+
+    #Settle the way game.py does: the stake has already been paid, a win pays
+    #back twice the bet, a draw pays back the bet
+    bet = np.where(blackjack, BLACKJACK_BONUS, stake)
+    dealerBust = dealer > 21
+    win = dealerBust | (~busted & (player > dealer))
+    push = ~dealerBust & ~busted & (player == dealer)
+    net = np.where(win, 2 * bet, np.where(push, bet, 0.0)) - stake
+    return net, busted
+
+
+def simulate(numHands, policy=None, numDecks=1, suit=GAME_SUIT, seed=None, chunkSize=1 << 16):
+    #Plays numHands hands in chunks and returns a SimResult
+    if policy is None:
+        policy = HitBelow()
+    rng = np.random.default_rng(seed)
+    result = SimResult()
+    started = time.perf_counter()
+    done = 0
+    while done < numHands:
+        size = min(chunkSize, numHands - done)
+        result.add(*playHands(size, policy, rng, numDecks, suit))
+        done += size
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _simulateTask(task):
+    numHands, policy, numDecks, suit, seedSeq = task
+    return simulate(numHands, policy, numDecks, suit, seed=seedSeq)
+
+
+def simulateParallel(numHands, policy=None, numDecks=1, suit=GAME_SUIT, seed=None,
+                     workers=None, taskSize=1 << 20):
+    #Splits numHands into fixed size tasks and plays them on a process pool.
+    #Task i always gets the i-th child stream of SeedSequence(seed) and the
+    #partial results are merged in task order, so for a given seed the answer
+    #is the same whatever the number of workers.
+    if policy is None:
+        policy = HitBelow()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    numTasks = -(-numHands // taskSize)
+    streams = np.random.SeedSequence(seed).spawn(numTasks)
+    tasks = [(min(taskSize, numHands - i * taskSize), policy, numDecks, suit, streams[i])
+             for i in range(numTasks)]
+
+    started = time.perf_counter()
+    result = SimResult()
+    if workers == 1:
+        partials = [_simulateTask(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            partials = list(pool.map(_simulateTask, tasks))
+    for partial in partials:
+        result.merge(partial)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+if __name__ == "__main__":
+    print(simulate(1000000, seed=0))
+
+    #The engine and the simulator must agree on a double down that isn't
+    #allowed (here on three cards): both stand. The engine plays with a
+    #fresh shoe every hand, like playHands().
+    numHands = 20000
+    rng = random.Random(0)
+    nets = np.empty(numHands)
+    for hand in range(numHands):
+        engine = BlackjackEngine(lambda playerHand, dealerCard: HIT if len(playerHand) < 3 else DOUBLE,
+                                 shoe=Shoe(rng=rng), bits=10)
+        nets[hand] = engine.playRound(1)
+    simulated = simulate(numHands, lambda total, upcard, numCards: np.where(numCards < 3, HIT, DOUBLE), seed=0)
+    error = np.sqrt(nets.var() / numHands + simulated.variance / simulated.hands)
+    print("Refused double down, engine EV {0:.4f} vs simulator {1:.4f} (+/- {2:.4f})".format(
+        nets.mean(), simulated.ev, error))
+    if abs(nets.mean() - simulated.ev) > 4 * error:
+        raise SystemExit("The engine and the simulator disagree")
+
+    print(simulateParallel(4000000, seed=0))
@@ -0,0 +1,165 @@
+"""
+Exact expected values for hit, stand and double under the game.py rules.
+
+For every dealer upcard the solver recurses over the cards left in the shoe
+that fillDeck() builds, memoizing on (total, remaining cards). Each entry
+starts from the two card hands that make the total, with the upcard and
+both cards taken out of the shoe, and averages them by how likely each hand
+is, so the values are exact for a two card hand in a fresh shoe. After
+hitting the same entries are used as a close approximation. Aces are always worth 11 in
+game.py (real.py adds separate 1 valued aces), so there are no soft totals
+and a state is just (player total, dealer upcard). Two aces make 22, which
+game.py only counts as a bust once the player hits, so 22 is in the table.
+
+The result is an array ev[total, upcard, action - 1] that policies index
+directly, so every decision is an O(1) lookup. Save it with saveTable() and
+load it back with loadTable().
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from blackjack_engine import HIT, STAND, DOUBLE, DEALER_STANDS_ON
+from blackjack_sim import deckCounts
+from shoe import GAME_SUIT
+
+# Totals and upcards index the table directly, so it is a little sparse
+NUM_TOTALS = 23
+NUM_UPCARDS = 12
+
+
+def _draws(deck):
+    #Every card we could draw next with its probability and the deck left
+    left = sum(deck)
+    for index, count in enumerate(deck):
+        if count:
+            rest = deck[:index] + (count - 1,) + deck[index + 1:]
+            yield index, count / left, rest
+
+
+def solve(numDecks=1, suit=GAME_SUIT, dealerStandsOn=DEALER_STANDS_ON):
+    #Returns the ev table for one shoe and dealer rule
+    values, counts = deckCounts(suit, numDecks)
+    values = [int(value) for value in values]
+    ev = np.full((NUM_TOTALS, NUM_UPCARDS, 3), np.nan)
+
+    for upIndex, upcard in enumerate(values):
+        shoe = tuple(int(count) for count in counts)
+        shoe = shoe[:upIndex] + (shoe[upIndex] - 1,) + shoe[upIndex + 1:]
+
+        @lru_cache(maxsize=None)
+        def dealer(total, deck):
+            #Chances of a dealer on total, with a card still to come,
+            #finishing on each total from dealerStandsOn up, bust last
+            outcome = [0.0] * (22 - dealerStandsOn + 1)
+            left = sum(deck)
+            for index, count in enumerate(deck):
+                if not count:
+                    continue
+                chance = count / left
+                newTotal = total + values[index]
+                if newTotal >= dealerStandsOn:
+                    #Finished, no need to recurse
+                    outcome[min(newTotal, 22) - dealerStandsOn] += chance
+                else:
+                    rest = deck[:index] + (count - 1,) + deck[index + 1:]
+                    for finish, finishChance in enumerate(dealer(newTotal, rest)):
+                        outcome[finish] += chance * finishChance
+            return tuple(outcome)
+
+        @lru_cache(maxsize=None)
+        def bust(deck):
+            #The dealer still turns over the hole card, and two aces bust
+            won = sum(chance for index, chance, rest in _draws(deck)
+                      if upcard + values[index] > 21)
+            return won - (1.0 - won)
+
+        @lru_cache(maxsize=None)
+        def stand(total, deck):
+            outcome = dealer(upcard, deck)
+            result = outcome[-1]
+            for finish, chance in enumerate(outcome[:-1], dealerStandsOn):
+                if total > finish:
+                    result += chance
+                elif total < finish:
+                    result -= chance
+            return result
+
+        @lru_cache(maxsize=None)
+        def hit(total, deck):
+            result = 0.0
+            for index, chance, rest in _draws(deck):
+                newTotal = total + values[index]
+                if newTotal > 21:
+                    result += chance * bust(rest)
+                else:
+                    result += chance * max(stand(newTotal, rest), hit(newTotal, rest))
+            return result
+
+        def double(total, deck):
+            result = 0.0
+            for index, chance, rest in _draws(deck):
+                newTotal = total + values[index]
+                if newTotal > 21:
+                    result += chance * bust(rest)
+                else:
+                    result += chance * stand(newTotal, rest)
+            return 2 * result
+
+        #Every total is an average over the two card hands that make it,
+        #each played from the shoe without its two cards
+        sums = np.zeros((NUM_TOTALS, 3))
+        chances = np.zeros(NUM_TOTALS)
+        for first, firstChance, afterFirst in _draws(shoe):
+            for second, secondChance, deck in _draws(afterFirst):
+                total = values[first] + values[second]
+                chance = firstChance * secondChance
+                chances[total] += chance
+                sums[total, HIT - 1] += chance * hit(total, deck)
+                sums[total, STAND - 1] += chance * stand(total, deck)
+                sums[total, DOUBLE - 1] += chance * double(total, deck)
+        dealt = chances > 0
+        ev[dealt, upcard] = sums[dealt] / chances[dealt, None]
+    return ev
+
+
+def bestActions(ev):
+    #Best action on two cards and after hitting, as int arrays [total, upcard]
+    filled = np.nan_to_num(ev, nan=-np.inf)
+    twoCards = filled.argmax(axis=2) + 1
+    moreCards = filled[:, :, :DOUBLE - 1].argmax(axis=2) + 1
+    return twoCards, moreCards
+
+
+class TablePolicy:
+    #Vectorized policy for blackjack_sim that looks every decision up
+    def __init__(self, ev):
+        self.twoCards, self.moreCards = bestActions(ev)
+
+    def __call__(self, total, upcard, numCards):
+        return np.where(numCards == 2, self.twoCards[total, upcard], self.moreCards[total, upcard])
+
+
+def saveTable(ev, path):
+    np.save(path, ev)
+
+
+def loadTable(path):
+    return np.load(path)
+
+
+if __name__ == "__main__":
+    import time
+    from blackjack_sim import simulate
+
+    started = time.perf_counter()
+    ev = solve()
+    print("Solved in {0:.2f}s".format(time.perf_counter() - started))
+
+    names = {HIT: "H", STAND: "S", DOUBLE: "D"}
+    twoCards, moreCards = bestActions(ev)
+    print("     " + " ".join("{0:>2}".format(upcard) for upcard in range(2, 12)))
+    for total in range(4, NUM_TOTALS):
+        print("{0:>2}:  ".format(total) + "  ".join(names[action] for action in twoCards[total, 2:]))
+
+    print(simulate(1000000, TablePolicy(ev), seed=0))
@@ -0,0 +1,101 @@
+"""
+Compact encoding for the king and rook against king positions in
+datasets/chess.csv.
+
+A position is three squares, 0 to 63 (file + 8 * rank), for the white king,
+white rook and black king, kept as uint8. Without pawns the board has 8
+symmetries (4 rotations, each with or without a mirror image) and they
+don't change the result, so every position is replaced by whichever of
+its 8 images has the smallest key wk * 4096 + wr * 64 + bk. Equal positions
+then have equal rows, duplicates can be dropped before training, and the
+classifiers get 6 small integer columns (file and rank of each piece)
+instead of the one-hot columns from pd.get_dummies.
+"""
+import numpy as np
+import pandas as pd
+
+PIECES = ["white_king", "white_rook", "black_king"]
+FEATURES = ["{0}_{1}".format(piece, part) for piece in PIECES for part in ("file", "rank")]
+
+#The 8 symmetries as (swap file and rank, flip file, flip rank)
+SYMMETRIES = [(swap, flipFile, flipRank) for swap in (False, True)
+              for flipFile in (False, True) for flipRank in (False, True)]
+
+
+def squaresOf(df):
+    #(rows x 3) uint8 squares from the chess.csv columns, files "a" to "h"
+    #and ranks 1 to 8
+    squares = np.empty((len(df), len(PIECES)), dtype=np.uint8)
+    for column, piece in enumerate(PIECES):
+        files = df[piece + "_file"].to_numpy()
+        if files.dtype.kind in "OUS" or str(files.dtype) in ("str", "string"):
+            files = np.frombuffer("".join(files).encode("ascii"), dtype=np.uint8) - ord("a")
+        squares[:, column] = files + 8 * (df[piece + "_rank"].to_numpy() - 1)
+    return squares
+
+
+def keyOf(squares):
+    squares = squares.astype(np.int32)
+    return (squares[:, 0] * 64 + squares[:, 1]) * 64 + squares[:, 2]
+
+
+def canonical(squares):
+    #Every position as the image with the smallest key
+    file = squares % 8
+    rank = squares // 8
+    images = []
+    for swap, flipFile, flipRank in SYMMETRIES:
+        newFile, newRank = (rank, file) if swap else (file, rank)
+        if flipFile:
+            newFile = 7 - newFile
+        if flipRank:
+            newRank = 7 - newRank
+        images.append((newFile + 8 * newRank).astype(np.uint8))
+    images = np.stack(images)
+    best = np.argmin(np.stack([keyOf(image) for image in images]), axis=0)
+    return images[best, np.arange(len(squares))]
+
+
+def features(squares):
+    #(rows x 6) uint8: file and rank (0 to 7) of each piece
+    result = np.empty((len(squares), 2 * len(PIECES)), dtype=np.uint8)
+    result[:, 0::2] = squares % 8
+    result[:, 1::2] = squares // 8
+    return result
+
+
+def encodeFrame(df, dedupe=True, result="result"):
+    #The chess.csv frame as canonical uint8 feature columns plus the result.
+    #With dedupe only the first row of each canonical position is kept. The
+    #index is the original one, so rows can still be matched to df.
+    squares = canonical(squaresOf(df))
+    index = df.index.to_numpy()
+    labels = df[result].to_numpy() if result in df else None
+    if dedupe:
+        keys, first = np.unique(keyOf(squares), return_index=True)
+        first.sort()
+        squares, index = squares[first], index[first]
+        labels = None if labels is None else labels[first]
+    encoded = pd.DataFrame(features(squares), columns=FEATURES, index=index)
+    if labels is not None:
+        encoded[result] = labels
+    return encoded
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from sklearn.tree import DecisionTreeClassifier
+
+    #python chess_encoding.py [datasets/chess.csv]
+    df = pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else "datasets/chess.csv")
+    onehot = pd.get_dummies(df, columns=["white_king_file", "white_rook_file", "black_king_file"])
+    encoded = encodeFrame(df)
+    for name, frame in (("get_dummies", onehot), ("canonical", encoded)):
+        X = frame.drop("result", axis=1)
+        started = time.perf_counter()
+        classifier = DecisionTreeClassifier(random_state=0).fit(X, frame["result"])
+        classifier.predict(X)
+        print("{0}: {1} rows x {2} columns, {3} KB, fit + predict {4:.3f}s".format(
+            name, X.shape[0], X.shape[1], X.memory_usage(index=False).sum() // 1024, time.perf_counter() - started))
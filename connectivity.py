@@ -0,0 +1,148 @@
+"""
+Which nodes can reach each other, without searching.
+
+Connectivity is a disjoint-set forest (union-find) with union by rank and
+path compression, so adding an edge or asking whether two nodes are
+connected costs close to O(1). It can be built from a graph dict, a
+CSRGraph or states.csv, and kept up to date one edge at a time with
+addEdge(), which can also add the edge to the graph dict itself.
+
+Edges are treated as undirected. On a directed graph connected() == False
+still means there is no path, so the search functions can use it to give up
+on hopeless queries straight away, but True doesn't promise one.
+"""
+from csrgraph import CSRGraph
+
+
+class Connectivity:
+    def __init__(self):
+        self.ids = {}
+        self.parent = []
+        self.rank = []
+        self.numComponents = 0
+
+    @classmethod
+    def fromGraph(cls, graph):
+        index = cls()
+        if isinstance(graph, CSRGraph):
+            for label in graph.labels:
+                index.add(label)
+            offsets = graph.offsets
+            #Every edge as a pair of ids, the ids are the same as graph's
+            for node in range(graph.numNodes):
+                for other in graph.targets[offsets[node]:offsets[node + 1]].tolist():
+                    index._union(node, other)
+            return index
+        for node, neighbours in graph.items():
+            index.add(node)
+            for other in neighbours:
+                index.addEdge(node, other)
+        return index
+
+    @classmethod
+    def fromCsv(cls, path):
+        #An edge list like states.csv: a header line, then "state, bordering_state"
+        index = cls()
+        with open(path) as lines:
+            next(lines, None)
+            for line in lines:
+                line = line.strip()
+                if line:
+                    index.addEdge(*line.split(", "))
+        return index
+
+    def add(self, node):
+        #Makes node its own component if it's new, returns its id
+        nodeId = self.ids.get(node)
+        if nodeId is None:
+            nodeId = self.ids[node] = len(self.parent)
+            self.parent.append(nodeId)
+            self.rank.append(0)
+            self.numComponents += 1
+        return nodeId
+
+    def _find(self, nodeId):
+        parent = self.parent
+        root = nodeId
+        while parent[root] != root:
+            root = parent[root]
+        #Path compression: point everything on the way straight at the root
+        while parent[nodeId] != root:
+            parent[nodeId], nodeId = root, parent[nodeId]
+        return root
+
+    def _union(self, first, second):
+        first = self._find(first)
+        second = self._find(second)
+        if first == second:
+            return False
+        #Union by rank: hang the shallower tree under the deeper one
+        if self.rank[first] < self.rank[second]:
+            first, second = second, first
+        self.parent[second] = first
+        if self.rank[first] == self.rank[second]:
+            self.rank[first] += 1
+        self.numComponents -= 1
+        return True
+
+    def addEdge(self, first, second, graph=None, undirected=True):
+        #Joins the components of first and second. If graph is a dict, the
+        #edge is added to it as well (both ways if undirected). Returns True
+        #if two components were merged.
+        if graph is not None:
+            _link(graph, first, second)
+            if undirected:
+                _link(graph, second, first)
+        return self._union(self.add(first), self.add(second))
+
+    def connected(self, first, second):
+        if first == second:
+            return True
+        if first not in self.ids or second not in self.ids:
+            return False
+        return self._find(self.ids[first]) == self._find(self.ids[second])
+
+    def __contains__(self, node):
+        return node in self.ids
+
+    def __len__(self):
+        return len(self.parent)
+
+
+def _link(graph, node, other):
+    neighbours = graph.setdefault(node, [])
+    if other not in neighbours:
+        if isinstance(neighbours, set):
+            neighbours.add(other)
+        else:
+            neighbours.append(other)
+
+
+if __name__ == "__main__":
+    import time
+
+    from bfs import bfsShortestPath
+    from graphgen import randomGraph
+
+    borders = Connectivity.fromCsv("states.csv")
+    print("{0} states in {1} component(s)".format(len(borders), borders.numComponents))
+    islands = {}
+    borders.addEdge("Hawaii", "Midway", islands)
+    print(islands)
+    print("Georgia to Florida:", borders.connected("Georgia", "Florida"))
+    print("Georgia to Hawaii:", borders.connected("Georgia", "Hawaii"))
+
+    #A sparse random graph has lots of small pieces, so many queries are hopeless
+    graph = randomGraph(200000, 2, seed=0)
+    started = time.perf_counter()
+    index = Connectivity.fromGraph(graph)
+    print("{0} components indexed in {1:.2f}s".format(index.numComponents, time.perf_counter() - started))
+    queries = [(node, node * 7919 % graph.numNodes) for node in range(1, 201)]
+    for connectivity in (None, index):
+        stats = {}
+        started = time.perf_counter()
+        found = sum(bfsShortestPath(graph, start, goal, stats, connectivity) is not None
+                    for start, goal in queries)
+        print("{0}: {1} of {2} found, {3:.0f} nodes expanded, {4:.2f}s".format(
+            "with index" if connectivity else "without index", found, len(queries),
+            stats.get("expanded", 0), time.perf_counter() - started))
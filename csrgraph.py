@@ -0,0 +1,186 @@
+"""
+A compact graph for bfs.py and dfs.py.
+
+Node labels are interned to integer ids, and the adjacency lists are stored in
+CSR form: the neighbours of node i are targets[offsets[i]:offsets[i + 1]].
+That is 4 bytes per edge and 8 per node instead of a Python list per node and
+a string per edge.
+
+CSRGraph still behaves like the dict of lists bfs.py and dfs.py use
+(graph[label] gives the neighbour labels, graph.keys() the labels), so
+bfsFindPath() and findPath() run on it unchanged. Faster code can work on the
+ids directly with neighborIds(). An optional weights array, parallel to
+targets, gives every edge a length for the weighted searches.
+"""
+import operator
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class CSRGraph(Mapping):
+    def __init__(self, offsets, targets, labels, weights=None):
+        self.offsets = offsets
+        self.targets = targets
+        self.labels = labels
+        self.weights = weights
+        self._ids = None
+
+    @classmethod
+    def fromDict(cls, graph):
+        #Same dict literal as in bfs.py, label -> list of neighbour labels
+        labels = list(graph.keys())
+        ids = {label: index for index, label in enumerate(labels)}
+        for neighbours in graph.values():
+            for label in neighbours:
+                if label not in ids:
+                    ids[label] = len(labels)
+                    labels.append(label)
+
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        for index, label in enumerate(graph):
+            offsets[index + 1] = len(graph[label])
+        np.cumsum(offsets, out=offsets)
+        targets = np.fromiter((ids[label] for neighbours in graph.values() for label in neighbours),
+                              dtype=np.int32, count=int(offsets[-1]))
+        result = cls(offsets, targets, labels)
+        result._ids = ids
+        return result
+
+    @classmethod
+    def fromIds(cls, sources, targets, labels, undirected=False, weights=None):
+        #Builds the CSR arrays from two arrays of node ids, and optionally
+        #one weight per edge
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+        if undirected:
+            sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+            if weights is not None:
+                weights = np.concatenate([weights, weights])
+        order = np.argsort(sources, kind="stable")
+        offsets = np.zeros(len(labels) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(labels)), out=offsets[1:])
+        return cls(offsets, targets[order], labels, None if weights is None else weights[order])
+
+    @classmethod
+    def fromEdges(cls, edges, undirected=False):
+        #edges is any iterable of (label, label) pairs
+        ids = {}
+        labels = []
+        ends = []
+        for edge in edges:
+            for label in edge:
+                if label not in ids:
+                    ids[label] = len(labels)
+                    labels.append(label)
+                ends.append(ids[label])
+        ends = np.array(ends, dtype=np.int32).reshape(-1, 2)
+        result = cls.fromIds(ends[:, 0], ends[:, 1], labels, undirected)
+        result._ids = ids
+        return result
+
+    @classmethod
+    def fromCsv(cls, path, undirected=False):
+        #An edge list like states.csv: a header line, then "state, bordering_state"
+        def edges():
+            with open(path) as lines:
+                next(lines, None)
+                for line in lines:
+                    line = line.strip()
+                    if line:
+                        yield line.split(", ")
+        return cls.fromEdges(edges(), undirected)
+
+    @property
+    def numNodes(self):
+        return len(self.offsets) - 1
+
+    @property
+    def numEdges(self):
+        return len(self.targets)
+
+    @property
+    def nbytes(self):
+        #Size of the adjacency arrays, not counting the labels
+        size = self.offsets.nbytes + self.targets.nbytes
+        return size if self.weights is None else size + self.weights.nbytes
+
+    def idOf(self, label):
+        if isinstance(self.labels, range):
+            #Integer labels 0 to n - 1 need no lookup table. operator.index()
+            #takes numpy integers too, where range.index() would scan.
+            try:
+                nodeId = operator.index(label)
+            except TypeError:
+                raise KeyError(label)
+            if not 0 <= nodeId < len(self.labels):
+                raise KeyError(label)
+            return nodeId
+        if hasattr(self.labels, "lookup"):
+            #Labels that find their own ids, like the ones edgecache.py maps
+            #from disk, so no dict of every label is built
+            return self.labels.lookup(label)
+        if self._ids is None:
+            self._ids = {label: index for index, label in enumerate(self.labels)}
+        return self._ids[label]
+
+    def labelOf(self, nodeId):
+        return self.labels[nodeId]
+
+    def neighborIds(self, nodeId):
+        return self.targets[self.offsets[nodeId]:self.offsets[nodeId + 1]]
+
+    def degree(self, nodeId):
+        return int(self.offsets[nodeId + 1] - self.offsets[nodeId])
+
+    def gatherNeighbors(self, nodeIds):
+        #All neighbours of a whole array of nodes in one go
+        starts = self.offsets[nodeIds]
+        counts = self.offsets[nodeIds + 1] - starts
+        total = int(counts.sum())
+        if not total:
+            return self.targets[:0]
+        #Position of every edge: each node's start, then counting up
+        shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return self.targets[shift + np.arange(total)]
+
+    def distancesFrom(self, source):
+        #Hop counts from source to every node, -1 where it can't be reached.
+        #One vectorized step per BFS level.
+        distance = np.full(self.numNodes, -1, dtype=np.int32)
+        distance[source] = 0
+        frontier = np.array([source], dtype=np.int64)
+        level = 0
+        while len(frontier):
+            level += 1
+            reached = self.gatherNeighbors(frontier)
+            reached = np.unique(reached[distance[reached] < 0])
+            distance[reached] = level
+            frontier = reached
+        return distance
+
+    def toDict(self):
+        return {label: self[label] for label in self.labels}
+
+    def __getitem__(self, label):
+        labels = self.labels
+        return [labels[nodeId] for nodeId in self.neighborIds(self.idOf(label)).tolist()]
+
+    def __contains__(self, label):
+        try:
+            self.idOf(label)
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __len__(self):
+        return self.numNodes
+
+    def __repr__(self):
+        return "CSRGraph({0} nodes, {1} edges{2})".format(
+            self.numNodes, self.numEdges, ", weighted" if self.weights is not None else "")
@@ -1,4 +1,5 @@
 import random
+
 graph = {
     "A": ["B", "C", "H", "M"],
     "B": ["A", "C", "M"],
@@ -11,31 +12,113 @@ graph = {
     "S": ["D", "L"],
 }
 
-def findPath(graph, start, goal):
-    stack = []
-    visited = []    
-    stack.append(start)
-    current = start
+#True for a csrgraph.CSRGraph. Checked by its arrays rather than with
+#isinstance, so the dict searches don't need to import csrgraph and numpy.
+def _isCsr(graph):
+    return hasattr(graph, "offsets") and hasattr(graph, "targets")
+
 
-    while current != goal or not stack:
-        current = stack.pop()
-        visited.append(current)
-        for relatedNode in graph[current]:
+#Depth first walk that yields the path from start to every node it discovers,
+#in discovery order. The path is the walk's own stack, so it changes after
+#the next step: copy it if you want to keep it. Each node on the stack only
+#holds an iterator over its neighbours, and visited is a set.
+def _walk(graph, start):
+    visited = {start}
+    path = [start]
+    pending = [iter(graph.get(start, ()))]
+    yield path
+    while pending:
+        for relatedNode in pending[-1]:
             if relatedNode not in visited:
-                stack.append(relatedNode)
-    return visited
+                visited.add(relatedNode)
+                path.append(relatedNode)
+                pending.append(iter(graph.get(relatedNode, ())))
+                yield path
+                break
+        else:
+            #Every neighbour has been seen, back up one step
+            pending.pop()
+            path.pop()
+
+
+#The same walk on the ids of a CSRGraph. Visited is one byte per node and
+#each node on the stack only remembers which of its edges to try next.
+def _walkIds(graph, start):
+    offsets = memoryview(graph.offsets)
+    targets = memoryview(graph.targets)
+    visited = bytearray(graph.numNodes)
+    visited[start] = 1
+    path = [start]
+    edges = [offsets[start]]
+    yield path
+    while path:
+        position = edges[-1]
+        end = offsets[path[-1] + 1]
+        while position < end:
+            relatedNode = targets[position]
+            position += 1
+            if not visited[relatedNode]:
+                break
+        else:
+            edges.pop()
+            path.pop()
+            continue
+        edges[-1] = position
+        visited[relatedNode] = 1
+        path.append(relatedNode)
+        edges.append(offsets[relatedNode])
+        yield path
 
-start = random.randint(0, len(graph) - 1)
-goal = random.randint(0, len(graph) - 1)
-while goal == start:
-    goal = random.randint(0, len(graph) - 1)
 
-keys = list(graph.keys())
-path = findPath(graph, keys[start], keys[goal])
-print(path)
+def _walkPaths(graph, start):
+    if _isCsr(graph):
+        labels = graph.labels
+        for path in _walkIds(graph, graph.idOf(start)):
+            yield path, labels
+    else:
+        for path in _walk(graph, start):
+            yield path, None
 
-print("It took {0} steps to get from {1} to {2}".format(len(path) - 1, keys[start], keys[goal]))
 
+#Yields every node reachable from start in depth first discovery order.
+#Nothing is explored until it is asked for, so breaking out of the loop
+#early stops the search.
+def dfsIter(graph, start):
+    for path, labels in _walkPaths(graph, start):
+        yield path[-1] if labels is None else labels[path[-1]]
+
+
+#Returns a path from start to goal (not necessarily the shortest one),
+#or None if the goal can't be reached. If stats is a dict,
+#stats["expanded"] counts the nodes discovered, and a connectivity index
+#lets hopeless queries return None without searching.
+def findPath(graph, start, goal, stats=None, connectivity=None):
+    if connectivity is not None and not connectivity.connected(start, goal):
+        return None
+    discovered = 0
+    try:
+        for path, labels in _walkPaths(graph, start):
+            discovered += 1
+            current = path[-1] if labels is None else labels[path[-1]]
+            if current == goal:
+                return list(path) if labels is None else [labels[node] for node in path]
+        return None
+    finally:
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + discovered
+
+if __name__ == "__main__":
+    start = random.randint(0, len(graph) - 1)
+    goal = random.randint(0, len(graph) - 1)
+    while goal == start:
+        goal = random.randint(0, len(graph) - 1)
+
+    keys = list(graph.keys())
+    path = findPath(graph, keys[start], keys[goal])
+    print(path)
 
-# TODO: If you reach the goal, print the path you took to get here, otherwise
-# print a message saying you couldn't find a path.
+    if path is None:
+        print("There is no way to get from {0} to {1}".format(keys[start], keys[goal]))
+    else:
+        print("It took {0} steps to get from {1} to {2}".format(len(path) - 1, keys[start], keys[goal]))
+    print("Discovery order from {0}: {1}".format(keys[start], list(dfsIter(graph, keys[start]))))
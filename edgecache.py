@@ -0,0 +1,200 @@
+"""
+Loads big edge lists (like states.csv, one "state, bordering_state" per line
+after a header) into a CSRGraph, and caches the result.
+
+The first load reads the file in large chunks with pandas, interns the
+labels to integer ids chunk by chunk and builds the CSR arrays. It then
+writes them to one binary cache file next to the source:
+
+    64 byte header   magic, version, source size and mtime, flags, counts
+    offsets          int64, one per node + 1
+    targets          int32, one per edge
+    label offsets    int64, one per label + 1
+    label bytes      every label in utf-8, back to back
+    label order      int64 ids of the labels in sorted (utf-8) order
+
+Later loads memory-map the cache, so nothing is parsed or copied and the
+graph is ready in milliseconds. The labels are decoded one at a time when
+they are looked at, and a label is found by binary search over the label
+order, so no dict of every label is built either. If the source file's
+size or mtime no longer matches the header, or the file is shorter or
+longer than the header says, the cache is rebuilt.
+"""
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+from csrgraph import CSRGraph
+
+MAGIC = b"CSRGRAPH"
+VERSION = 2
+#magic, version, source size, source mtime, undirected, nodes, edges, label bytes
+HEADER = struct.Struct("<8s7q")
+
+
+class LabelTable(Sequence):
+    #Read-only list of labels over the cache's label offsets and bytes.
+    #order is the ids sorted by label, for lookup().
+    def __init__(self, offsets, blob, order):
+        self.offsets = offsets
+        self.blob = blob
+        self.order = order
+
+    def _bytes(self, index):
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._bytes(index).decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def lookup(self, label):
+        #Id of label, by binary search over the sorted order. CSRGraph.idOf()
+        #uses this instead of building a dict of every label.
+        if not isinstance(label, str):
+            raise KeyError(label)
+        wanted = label.encode("utf-8")
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self._bytes(self.order[middle]) < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.order) and self._bytes(self.order[low]) == wanted:
+            return int(self.order[low])
+        raise KeyError(label)
+
+
+def readEdges(path, undirected=False, chunkSize=1 << 20):
+    #Parses the edge list chunkSize lines at a time and returns a CSRGraph.
+    #Each chunk's labels are interned to chunk-local codes, then the chunks'
+    #distinct labels are interned once more to global ids, so no Python
+    #code runs per edge or per label.
+    chunkCodes = []
+    chunkLabels = []
+    chunks = pd.read_csv(path, header=0, usecols=[0, 1], dtype=object, skipinitialspace=True,
+                         keep_default_na=False, chunksize=chunkSize)
+    for chunk in chunks:
+        ends = np.concatenate([chunk.iloc[:, 0].to_numpy(), chunk.iloc[:, 1].to_numpy()])
+        codes, uniques = pd.factorize(ends)
+        chunkCodes.append(codes.astype(np.int32).reshape(2, -1))
+        chunkLabels.append(uniques)
+    if not chunkCodes:
+        return CSRGraph.fromIds([], [], [], undirected)
+
+    globalIds, labels = pd.factorize(np.concatenate(chunkLabels))
+    globalIds = globalIds.astype(np.int32)
+    sources = []
+    targets = []
+    first = 0
+    for codes, uniques in zip(chunkCodes, chunkLabels):
+        ends = globalIds[first:first + len(uniques)][codes]
+        first += len(uniques)
+        sources.append(ends[0])
+        targets.append(ends[1])
+    return CSRGraph.fromIds(np.concatenate(sources), np.concatenate(targets), list(labels), undirected)
+
+
+def _sourceStamp(path):
+    info = os.stat(path)
+    return info.st_size, info.st_mtime_ns
+
+
+def writeCache(graph, cachePath, sourcePath, undirected=False):
+    encoded = [str(label).encode("utf-8") for label in graph.labels]
+    labelOffsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(label) for label in encoded], out=labelOffsets[1:])
+    order = np.array(sorted(range(len(encoded)), key=encoded.__getitem__), dtype=np.int64)
+    size, mtime = _sourceStamp(sourcePath)
+    header = HEADER.pack(MAGIC, VERSION, size, mtime, int(undirected),
+                         graph.numNodes, graph.numEdges, int(labelOffsets[-1]))
+
+    #Written next to the cache and renamed over it, so a reader never sees
+    #half a file
+    partial = cachePath + ".tmp"
+    with open(partial, "wb") as out:
+        out.write(header)
+        out.write(np.ascontiguousarray(graph.offsets, dtype=np.int64).tobytes())
+        out.write(np.ascontiguousarray(graph.targets, dtype=np.int32).tobytes())
+        #Pad so the label offsets start on an 8 byte boundary
+        out.write(b"\0" * (-out.tell() % 8))
+        out.write(labelOffsets.tobytes())
+        out.write(b"".join(encoded))
+        out.write(b"\0" * (-out.tell() % 8))
+        out.write(order.tobytes())
+    os.replace(partial, cachePath)
+
+
+def _align(position):
+    #The label offsets and the label order start on an 8 byte boundary
+    return position + -position % 8
+
+
+def readCache(cachePath, sourcePath=None, undirected=False):
+    #Memory-maps a cache file, returns None if it's missing, from another
+    #version, built the other way round or older than sourcePath
+    try:
+        raw = np.memmap(cachePath, dtype=np.uint8, mode="r")
+    except (FileNotFoundError, ValueError):
+        return None
+    if len(raw) < HEADER.size:
+        return None
+    magic, version, size, mtime, cachedUndirected, numNodes, numEdges, labelBytes = \
+        HEADER.unpack(bytes(raw[:HEADER.size]))
+    if magic != MAGIC or version != VERSION or cachedUndirected != int(undirected):
+        return None
+    if sourcePath is not None and (size, mtime) != _sourceStamp(sourcePath):
+        return None
+
+    if min(numNodes, numEdges, labelBytes) < 0:
+        return None
+    #Where every section starts, and the file must end right after the last
+    targetsAt = HEADER.size + 8 * (numNodes + 1)
+    labelOffsetsAt = _align(targetsAt + 4 * numEdges)
+    blobAt = labelOffsetsAt + 8 * (numNodes + 1)
+    orderAt = _align(blobAt + labelBytes)
+    if len(raw) != orderAt + 8 * numNodes:
+        return None
+
+    offsets = raw[HEADER.size:targetsAt].view(np.int64)
+    targets = raw[targetsAt:targetsAt + 4 * numEdges].view(np.int32)
+    labelOffsets = raw[labelOffsetsAt:blobAt].view(np.int64)
+    blob = raw[blobAt:blobAt + labelBytes]
+    order = raw[orderAt:].view(np.int64)
+    return CSRGraph(offsets, targets, LabelTable(labelOffsets, blob, order))
+
+
+def loadEdgeList(path, undirected=False, cachePath=None, chunkSize=1 << 20):
+    #The graph from the cache if it's up to date, otherwise parsed from
+    #path and cached for next time
+    if cachePath is None:
+        cachePath = path + ".csrcache"
+    graph = readCache(cachePath, path, undirected)
+    if graph is None:
+        graph = readEdges(path, undirected, chunkSize)
+        writeCache(graph, cachePath, path, undirected)
+    return graph
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    #python edgecache.py states.csv
+    path = sys.argv[1] if len(sys.argv) > 1 else "states.csv"
+    for attempt in ("first load", "second load"):
+        started = time.perf_counter()
+        graph = loadEdgeList(path)
+        print("{0}: {1} in {2:.1f} ms".format(attempt, graph, (time.perf_counter() - started) * 1000))
+    print(graph[graph.labelOf(0)])
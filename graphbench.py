@@ -0,0 +1,162 @@
+"""
+Benchmarks for the graph code on synthetic graphs.
+
+Every (family, size) case builds one graph from graphgen.py in a fresh worker
+process, runs a fixed, seeded set of (start, goal) queries through each
+search, and records queries per second, nodes expanded per query and the
+worker's peak RSS. Results are written as JSON, and compare() checks a run
+against an earlier one and flags anything that got slower, expanded more or
+used more memory than the tolerance allows.
+
+    python graphbench.py run results.json [maxNodes] [numQueries]
+    python graphbench.py compare baseline.json results.json [tolerance]
+"""
+import json
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from astar import astar, dijkstra, euclidean
+from bfs import bfsShortestPath, bidirectionalPath
+from dfs import findPath
+from graphgen import gridGraph, randomGraph, roadGraph, scaleFreeGraph
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7)
+
+
+def _square(generator):
+    def build(numNodes, seed):
+        side = max(int(round(numNodes ** 0.5)), 1)
+        return generator(side, side, seed=seed)
+    return build
+
+
+#family -> build(numNodes, seed), returning a graph or (graph, coordinates)
+FAMILIES = {
+    "random": lambda numNodes, seed: randomGraph(numNodes, 8, seed=seed),
+    "grid": _square(gridGraph),
+    "scalefree": lambda numNodes, seed: scaleFreeGraph(numNodes, 3, seed=seed),
+    "road": roadGraph,
+}
+
+
+def _searches(graph, coords):
+    #name -> search(start, goal, stats), A* only where there are coordinates
+    searches = {
+        "bfs": lambda start, goal, stats: bfsShortestPath(graph, start, goal, stats),
+        "bidirectional": lambda start, goal, stats: bidirectionalPath(graph, start, goal, stats),
+        "dfs": lambda start, goal, stats: findPath(graph, start, goal, stats),
+        "dijkstra": lambda start, goal, stats: dijkstra(graph, start, goal, stats=stats),
+    }
+    if coords is not None:
+        heuristic = euclidean(coords)
+        searches["astar"] = lambda start, goal, stats: astar(graph, start, goal, heuristic, stats=stats)
+    return searches
+
+
+def _peakRssMb():
+    #ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def runCase(family, numNodes, numQueries=20, seed=0):
+    #Builds one graph and times every search on the same queries
+    started = time.perf_counter()
+    built = FAMILIES[family](numNodes, seed)
+    graph, coords = built if isinstance(built, tuple) else (built, None)
+    buildSeconds = time.perf_counter() - started
+
+    rng = np.random.default_rng(seed)
+    queries = rng.integers(0, graph.numNodes, (numQueries, 2)).tolist()
+    results = []
+    for name, search in _searches(graph, coords).items():
+        stats = {}
+        started = time.perf_counter()
+        for start, goal in queries:
+            search(start, goal, stats)
+        seconds = time.perf_counter() - started
+        results.append({
+            "family": family,
+            "nodes": graph.numNodes,
+            "edges": graph.numEdges,
+            "search": name,
+            "queries": numQueries,
+            "seconds": seconds,
+            "queriesPerSecond": numQueries / seconds if seconds else float("inf"),
+            "expandedPerQuery": stats["expanded"] / numQueries if "expanded" in stats else None,
+            "buildSeconds": buildSeconds,
+        })
+    peak = _peakRssMb()
+    for result in results:
+        result["peakRssMb"] = peak
+    return results
+
+
+def runAll(maxNodes=10 ** 5, numQueries=20, families=None, seed=0):
+    #Each case gets its own worker process so its peak RSS is its own
+    results = []
+    for family in families or FAMILIES:
+        for numNodes in SIZES:
+            if numNodes > maxNodes:
+                continue
+            with ProcessPoolExecutor(1) as pool:
+                caseResults = pool.submit(runCase, family, numNodes, numQueries, seed).result()
+            for result in caseResults:
+                print("{family:>9} {nodes:>8} {search:>13}: {queriesPerSecond:10.1f} queries/s, "
+                      "{expanded} expanded/query, {peakRssMb:.0f} MB".format(
+                          expanded="-" if result["expandedPerQuery"] is None else
+                          "{0:.0f}".format(result["expandedPerQuery"]), **result))
+            results.extend(caseResults)
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+
+
+def compare(baseline, current, tolerance=0.10):
+    #Returns a line for every result in current that is worse than the same
+    #(family, nodes, search) in baseline by more than tolerance
+    before = {(result["family"], result["nodes"], result["search"]): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        key = (result["family"], result["nodes"], result["search"])
+        old = before.get(key)
+        if old is None:
+            continue
+        checks = (("queriesPerSecond", False), ("expandedPerQuery", True), ("peakRssMb", True))
+        for field, higherIsWorse in checks:
+            if old.get(field) is None or result.get(field) is None or not old[field]:
+                continue
+            change = result[field] / old[field] - 1
+            if (change > tolerance) if higherIsWorse else (change < -tolerance):
+                regressions.append("{0} {1} {2}: {3} {4:.4g} -> {5:.4g} ({6:+.0%})".format(
+                    *key, field, old[field], result[field], change))
+    return regressions
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "run":
+        maxNodes = int(float(sys.argv[3])) if len(sys.argv) > 3 else 10 ** 5
+        numQueries = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+        report = runAll(maxNodes, numQueries)
+        with open(sys.argv[2], "w") as out:
+            json.dump(report, out, indent=1)
+    elif len(sys.argv) >= 4 and sys.argv[1] == "compare":
+        with open(sys.argv[2]) as first, open(sys.argv[3]) as second:
+            baseline, current = json.load(first), json.load(second)
+        tolerance = float(sys.argv[4]) if len(sys.argv) > 4 else 0.10
+        regressions = compare(baseline, current, tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        print("{0} regression(s)".format(len(regressions)))
+        sys.exit(1 if regressions else 0)
+    else:
+        print(__doc__)
@@ -0,0 +1,84 @@
+"""
+Synthetic graphs for trying out the search code on something bigger than the
+9 node dict in bfs.py. Every generator returns an undirected CSRGraph whose
+labels are the integer node ids (gridGraph also returns node coordinates).
+"""
+import numpy as np
+
+from csrgraph import CSRGraph
+
+
+def randomGraph(numNodes, avgDegree=10, seed=None):
+    #Erdos-Renyi style: numNodes * avgDegree / 2 edges between random nodes
+    rng = np.random.default_rng(seed)
+    numEdges = numNodes * avgDegree // 2
+    sources = rng.integers(0, numNodes, numEdges)
+    targets = rng.integers(0, numNodes, numEdges)
+    keep = sources != targets
+    return CSRGraph.fromIds(sources[keep], targets[keep], range(numNodes), undirected=True)
+
+
+def gridGraph(width, height, jitter=1.0, blocked=0.0, seed=None):
+    #A road-map-like grid: node y * width + x sits at (x, y) and is joined
+    #to the nodes left, right, above and below it. Each edge is as long as
+    #the gap between its ends times a random 1 to 1 + jitter, so the
+    #straight line distance never overestimates a route. blocked is the
+    #fraction of edges left out.
+    #Returns the graph and a (nodes x 2) array of coordinates.
+    rng = np.random.default_rng(seed)
+    nodes = np.arange(width * height).reshape(height, width)
+    sources = np.concatenate([nodes[:, :-1].ravel(), nodes[:-1, :].ravel()])
+    targets = np.concatenate([nodes[:, 1:].ravel(), nodes[1:, :].ravel()])
+    if blocked:
+        keep = rng.random(len(sources)) >= blocked
+        sources, targets = sources[keep], targets[keep]
+    weights = 1.0 + jitter * rng.random(len(sources))
+    coords = np.stack([nodes % width, nodes // width], axis=-1).reshape(-1, 2).astype(np.float64)
+    graph = CSRGraph.fromIds(sources, targets, range(width * height), undirected=True, weights=weights)
+    return graph, coords
+
+
+def scaleFreeGraph(numNodes, edgesPerNode=3, seed=None):
+    #Barabasi-Albert preferential attachment: every new node links to
+    #edgesPerNode earlier nodes picked in proportion to their degree.
+    #Picking a uniformly random end of a random earlier edge is picking in
+    #proportion to degree, so edge k's target is a copy of end r[k] of the
+    #list of all edge ends, r[k] < 2k. Sources are known up front, and
+    #targets that copy another target are resolved by pointer jumping, all
+    #edges at once, instead of adding the nodes one by one.
+    rng = np.random.default_rng(seed)
+    first = edgesPerNode + 1
+    numEdges = max(numNodes - first, 0) * edgesPerNode
+    sources = np.repeat(np.arange(first, numNodes), edgesPerNode)
+    #Ends 2k and 2k + 1 belong to edge k, the first ends are a seed clique
+    seedEdges = np.array([(i, j) for i in range(first) for j in range(i)], dtype=np.int64).reshape(-1, 2)
+    numSeed = len(seedEdges)
+    ends = np.empty(2 * (numSeed + numEdges), dtype=np.int64)
+    ends[0:2 * numSeed:2] = seedEdges[:, 0]
+    ends[1:2 * numSeed:2] = seedEdges[:, 1]
+    ends[2 * numSeed::2] = sources
+    #Every new edge copies an end from before its own node's first edge
+    nodeStart = 2 * (numSeed + (sources - first) * edgesPerNode)
+    pointer = (rng.random(numEdges) * nodeStart).astype(np.int64)
+    while True:
+        unresolved = pointer % 2 == 1
+        unresolved &= pointer >= 2 * numSeed
+        if not unresolved.any():
+            break
+        #A target end: follow it to the end it copied
+        pointer[unresolved] = pointer[(pointer[unresolved] - 2 * numSeed - 1) // 2]
+    ends[2 * numSeed + 1::2] = ends[pointer]
+    #Drop the self loops and the repeats of an edge that was picked twice
+    pairs = np.sort(ends.reshape(-1, 2), axis=1)
+    keys = np.unique(pairs[:, 0] * numNodes + pairs[:, 1])
+    sources, targets = keys // numNodes, keys % numNodes
+    keep = sources != targets
+    return CSRGraph.fromIds(sources[keep], targets[keep], range(numNodes), undirected=True)
+
+
+def roadGraph(numNodes, seed=None):
+    #Sparse and nearly planar like a road map: a square grid with a third of
+    #the streets missing and lengths a little longer than the straight line.
+    #Returns the graph and the node coordinates like gridGraph.
+    side = max(int(round(numNodes ** 0.5)), 1)
+    return gridGraph(side, side, jitter=0.5, blocked=0.3, seed=seed)
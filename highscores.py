@@ -0,0 +1,71 @@
+"""
+The blackjack high score board, kept in SQLite instead of highscore.txt.
+
+Every score is one row and the scores are indexed, so any number of game
+processes can save at the same time (each insert is its own atomic
+transaction) and the top N come straight off the index in O(log n + N)
+however many scores have been saved.
+"""
+import re
+import sqlite3
+import time
+
+
+class HighScores:
+    def __init__(self, path="highscores.db", timeout=30.0):
+        self.path = path
+        #Autocommit, so every single insert is atomic on its own
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        #WAL lets readers keep going while another process is writing
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " id INTEGER PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " score REAL NOT NULL,"
+            " saved REAL NOT NULL)")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id)")
+
+    def add(self, name, score):
+        self.connection.execute(
+            "INSERT INTO scores (name, score, saved) VALUES (?, ?, ?)", (name, score, time.time()))
+
+    def addMany(self, scores):
+        #Saves (name, score) pairs in one transaction
+        saved = time.time()
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany(
+                "INSERT INTO scores (name, score, saved) VALUES (?, ?, ?)",
+                ((name, score, saved) for name, score in scores))
+
+    def top(self, n=10):
+        #The n best (name, score) pairs, the earliest first on a tie
+        return self.connection.execute(
+            "SELECT name, score FROM scores ORDER BY score DESC, id LIMIT ?", (n,)).fetchall()
+
+    def importText(self, path="highscore.txt"):
+        #Copies the " name, score: N" lines game.py used to write
+        pattern = re.compile(r"^\s*(.*), score: (\S+)\s*$")
+        scores = []
+        with open(path) as highscore:
+            for line in highscore:
+                match = pattern.match(line)
+                if match:
+                    scores.append((match.group(1), float(match.group(2))))
+        self.addMany(scores)
+        return len(scores)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
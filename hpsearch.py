@@ -0,0 +1,294 @@
+"""
+Hyperparameter search for the chess classifiers that can be stopped and
+picked up again.
+
+The work is split into (config, fold) tasks spread over a process pool. The
+data and the fold indices go to each worker once when it starts, so a task
+is just an estimator name, its parameters and a fold number. Every fold's
+score is saved in SQLite as soon as it comes back, under a key made from the
+config, a hash of the data, the number of folds and the split seed. A search
+that was interrupted, or run again with a bigger grid, only computes the
+folds that aren't in the cache yet.
+
+halvingSearch() is the cheap alternative to the full grid: successive
+halving runs every config on a small sample of the rows, keeps the best
+1 / factor of them, and runs those again on factor times as many rows,
+until one config is left or the sample is the whole data set. Each kind of
+estimator is halved on its own, because a small sample favours some kinds
+(a forest beats a single tree on a few hundred rows but not on all of
+them), and the winners of each kind are compared on all the data. Forests
+get a share of their usual number of trees that grows with the sample, as
+a forest's fit time on a small sample is mostly its trees. The fit time
+of every fold is saved too, so both kinds of search can say how much CPU
+time they cost, even when the folds came out of the cache.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.tree import DecisionTreeClassifier
+
+ESTIMATORS = {
+    "dt": DecisionTreeClassifier,
+    "rf": RandomForestClassifier,
+    "knn": KNeighborsClassifier,
+}
+
+#Every fit uses this random_state unless the grid sets one. It is part of
+#the fold keys, so scores cached by unseeded fits are never reused.
+FIT_SEED = 0
+
+#Forests also get fewer trees in the early halving rounds, down to this many
+MIN_TREES = 10
+
+
+class ScoreCache:
+    #Fold scores on disk, one row per (config, data, split, fold) key
+    def __init__(self, path="hpsearch.db", timeout=30.0):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS folds ("
+            " key TEXT PRIMARY KEY,"
+            " estimator TEXT NOT NULL,"
+            " params TEXT NOT NULL,"
+            " fold INTEGER NOT NULL,"
+            " score REAL NOT NULL,"
+            " seconds REAL NOT NULL,"
+            " saved REAL NOT NULL)")
+
+    def get(self, keys):
+        #{key: (score, seconds)} for the keys that are cached
+        found = {}
+        keys = list(keys)
+        for first in range(0, len(keys), 500):
+            chunk = keys[first:first + 500]
+            rows = self.connection.execute(
+                "SELECT key, score, seconds FROM folds WHERE key IN ({0})".format(",".join("?" * len(chunk))),
+                chunk)
+            found.update((key, (score, seconds)) for key, score, seconds in rows)
+        return found
+
+    def put(self, key, estimator, params, fold, score, seconds):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO folds VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, estimator, _paramsText(params), fold, score, seconds, time.time()))
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _paramsText(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def datasetHash(X, y):
+    #Changes if any value, column or row order of the data changes
+    digest = hashlib.sha256()
+    for frame in (pd.DataFrame(X), pd.DataFrame(y)):
+        digest.update(",".join(map(str, frame.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def foldKey(estimator, params, dataHash, numFolds, seed, fold):
+    text = json.dumps([estimator, params, dataHash, numFolds, seed, fold, {"fitSeed": FIT_SEED}], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def expandGrids(grids):
+    #{"dt": [param grid, ...], ...} -> [(estimator, params), ...]
+    return [(estimator, dict(params)) for estimator, grid in grids.items() for params in ParameterGrid(grid)]
+
+
+#Set once in every worker by _startWorker
+_data = None
+
+
+def _startWorker(X, y, splits):
+    global _data
+    _data = (X, y, splits)
+
+
+def _scoreFold(task):
+    estimator, params, fold = task
+    X, y, splits = _data
+    train, test = splits[fold]
+    started = time.perf_counter()
+    model = ESTIMATORS[estimator](**params)
+    #Same seed for every fit, so equal configs tie exactly and a cached
+    #score is the score the fit would give again
+    if "random_state" in model.get_params() and "random_state" not in params:
+        model.set_params(random_state=FIT_SEED)
+    model.fit(X[train], y[train])
+    return model.score(X[test], y[test]), time.perf_counter() - started
+
+
+class SearchResult:
+    def __init__(self, estimator, params, scores, seconds=0.0):
+        self.estimator = estimator
+        self.params = params
+        self.scores = scores
+        #CPU time the folds took to fit and score, cached or not
+        self.seconds = seconds
+
+    @property
+    def mean(self):
+        return float(np.mean(self.scores))
+
+    def __repr__(self):
+        return "{0} {1}: {2:.4f}".format(self.estimator, _paramsText(self.params), self.mean)
+
+
+def _crossValidate(X, y, configs, cache, numFolds, seed, workers, verbose):
+    #A SearchResult for every (estimator, params) in configs, in order
+    dataHash = datasetHash(X, y)
+    splits = list(StratifiedKFold(numFolds, shuffle=True, random_state=seed).split(X, y))
+    keys = {(index, fold): foldKey(estimator, params, dataHash, numFolds, seed, fold)
+            for index, (estimator, params) in enumerate(configs) for fold in range(numFolds)}
+    scores = cache.get(keys.values())
+    missing = [(index, fold) for (index, fold), key in keys.items() if key not in scores]
+    if verbose:
+        print("{0} configs x {1} folds on {2} rows: {3} cached, {4} to run".format(
+            len(configs), numFolds, len(y), len(keys) - len(missing), len(missing)))
+
+    if missing:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        with ProcessPoolExecutor(workers, initializer=_startWorker, initargs=(X, y, splits)) as pool:
+            futures = {pool.submit(_scoreFold, (configs[index][0], configs[index][1], fold)): (index, fold)
+                       for index, fold in missing}
+            #Saved as each one finishes, so an interrupted run keeps them
+            for done, future in enumerate(as_completed(futures), 1):
+                index, fold = futures[future]
+                score, seconds = future.result()
+                estimator, params = configs[index]
+                cache.put(keys[index, fold], estimator, params, fold, score, seconds)
+                scores[keys[index, fold]] = (score, seconds)
+                if verbose and done % 50 == 0:
+                    print("{0} of {1} folds done".format(done, len(missing)))
+
+    results = []
+    for index, (estimator, params) in enumerate(configs):
+        folds = [scores[keys[index, fold]] for fold in range(numFolds)]
+        results.append(SearchResult(estimator, params, [score for score, seconds in folds],
+                                    sum(seconds for score, seconds in folds)))
+    return results
+
+
+def search(X, y, grids, cachePath="hpsearch.db", numFolds=5, seed=0, workers=None, verbose=True):
+    #Cross-validates every config in grids and returns a SearchResult for
+    #each, best mean score first. Cached folds aren't run again.
+    X = np.asarray(X)
+    y = np.asarray(y)
+    with ScoreCache(cachePath) as cache:
+        results = _crossValidate(X, y, expandGrids(grids), cache, numFolds, seed, workers, verbose)
+    results.sort(key=lambda result: result.mean, reverse=True)
+    return results
+
+
+def _budget(estimator, params, fraction):
+    #params for a halving round that gets fraction of the full budget
+    defaults = ESTIMATORS[estimator]().get_params()
+    if "n_estimators" not in defaults or "n_estimators" in params:
+        return params
+    trees = max(int(defaults["n_estimators"] * fraction), MIN_TREES)
+    return dict(params, n_estimators=min(trees, defaults["n_estimators"]))
+
+
+def halvingSearch(X, y, grids, factor=3, cachePath="hpsearch.db", numFolds=5, seed=0, workers=None,
+                  verbose=True):
+    #Successive halving over the configs in grids. Returns SearchResults for
+    #the winner of each kind of estimator on all the data, best first, and
+    #an (estimator, candidates, rows, seconds) tuple for every round.
+    X = np.asarray(X)
+    y = np.asarray(y)
+    #Every round's sample is the start of the same shuffled order, so each
+    #one contains the one before
+    order = np.random.default_rng(seed).permutation(len(y))
+
+    rounds = []
+    winners = []
+    with ScoreCache(cachePath) as cache:
+        for estimator, grid in grids.items():
+            survivors = expandGrids({estimator: grid})
+            #Enough rounds to get down to one config, the last on all the rows
+            numRounds = max(int(np.ceil(np.log(len(survivors)) / np.log(factor))), 0) + 1
+            for number in range(numRounds):
+                samples = max(len(y) // factor ** (numRounds - 1 - number), 10 * numFolds)
+                subset = np.sort(order[:min(samples, len(y))])
+                budgeted = [(name, _budget(name, params, len(subset) / len(y))) for name, params in survivors]
+                with warnings.catch_warnings():
+                    #Small samples can have fewer rows of a rare result than folds
+                    warnings.simplefilter("ignore", UserWarning)
+                    results = _crossValidate(X[subset], y[subset], budgeted, cache, numFolds, seed, workers,
+                                             verbose)
+                #Report the configs as they are in the grid
+                for result, (name, params) in zip(results, survivors):
+                    result.params = params
+                results.sort(key=lambda result: result.mean, reverse=True)
+                rounds.append((estimator, len(survivors), len(subset), sum(result.seconds for result in results)))
+                #Stop early once one config is left
+                if len(results) == 1:
+                    break
+                keep = max(int(np.ceil(len(results) / factor)), 1)
+                survivors = [(result.estimator, result.params) for result in results[:keep]]
+            winners.append(results[0] if len(subset) == len(y) else
+                           _crossValidate(X, y, survivors[:1], cache, numFolds, seed, workers, verbose)[0])
+
+    winners.sort(key=lambda result: result.mean, reverse=True)
+    if verbose:
+        for estimator, candidates, rows, seconds in rounds:
+            print("{0}: {1} configs on {2} rows, {3:.1f} CPU s".format(estimator, candidates, rows, seconds))
+        print("halving search: {0:.1f} CPU s".format(sum(round[-1] for round in rounds)))
+    return winners, rounds
+
+
+if __name__ == "__main__":
+    import sys
+
+    from chess_encoding import encodeFrame
+
+    #python hpsearch.py [datasets/chess.csv]
+    dataset = sys.argv[1] if len(sys.argv) > 1 else "datasets/chess.csv"
+    df = encodeFrame(pd.read_csv(dataset))
+    grids = {
+        "dt": {"max_depth": [100, 200, 500, 1000, 2000, 3000, 5000, None],
+               "criterion": ["entropy", "gini"],
+               "min_samples_split": [2, 3, 4, 5, 10]},
+        "rf": {"max_depth": [100, 200, 500, 1000, 2000, 3000, 5000, None],
+               "criterion": ["entropy", "gini"],
+               "min_samples_split": [2, 3, 4, 5, 10]},
+        "knn": {"n_neighbors": [2, 3, 4, 5, 10, 12, 15],
+                "p": [1, 2],
+                "algorithm": ["ball_tree", "kd_tree"]},
+    }
+    X = df.drop("result", axis=1).to_numpy(dtype=float)
+    y = df["result"].to_numpy()
+
+    started = time.perf_counter()
+    halving, rounds = halvingSearch(X, y, grids)
+    print("halving winner:", halving[0])
+    full = search(X, y, grids)
+    print("full grid winner:", full[0])
+    spent = sum(round[-1] for round in rounds)
+    gridCost = sum(result.seconds for result in full)
+    print("halving took {0:.1f} CPU s, the full grid {1:.1f} CPU s ({2:.0%})".format(
+        spent, gridCost, spent / gridCost))
+    print("Took {0:.1f}s".format(time.perf_counter() - started))
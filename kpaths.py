@@ -0,0 +1,149 @@
+"""
+More than one path between two nodes.
+
+kShortestPaths() is Yen's algorithm: it yields the loopless paths from start
+to goal cheapest first, and allShortestPaths() yields every path that ties
+for the shortest. Both are generators that only do the work for the next
+path when it is asked for, so taking the first few with itertools.islice
+costs a few searches however many paths there are.
+
+They take the same graphs and weights as astar.py: a dict of neighbour lists
+or a CSRGraph, with edge lengths from weight(node, relatedNode), a weighted
+CSRGraph's weights, or 1.
+"""
+import heapq
+import itertools
+
+from astar import _search
+from csrgraph import CSRGraph
+
+
+def _edgesOf(graph, weight=None):
+    #edges(node) -> list of (relatedNode, length) for any graph we search
+    if isinstance(graph, CSRGraph) and weight is None and graph.weights is not None:
+        labels = graph.labels
+        def edges(node):
+            nodeId = graph.idOf(node)
+            first, last = graph.offsets[nodeId], graph.offsets[nodeId + 1]
+            return list(zip([labels[other] for other in graph.targets[first:last].tolist()],
+                            graph.weights[first:last].tolist()))
+        return edges
+    if weight is None:
+        weight = lambda node, relatedNode: 1
+    def edges(node):
+        if node not in graph:
+            return []
+        return [(relatedNode, weight(node, relatedNode)) for relatedNode in graph[node]]
+    return edges
+
+
+#Yields (cost, path) for the loopless paths from start to goal, cheapest
+#first. Each path after the first takes one search per node of the path
+#before it.
+def kShortestPaths(graph, start, goal, weight=None):
+    edges = _edgesOf(graph, weight)
+    first = _search(edges, start, goal, None, None)
+    if first is None:
+        return
+    found = [first[1]]
+    yield first
+
+    #Candidates not yet yielded, cheapest on top
+    candidates = []
+    seen = {tuple(first[1])}
+    counter = itertools.count()
+    while True:
+        previous = found[-1]
+        #Cost of every prefix of the previous path
+        rootCosts = [0]
+        for node, relatedNode in zip(previous, previous[1:]):
+            rootCosts.append(rootCosts[-1] + min(length for other, length in edges(node) if other == relatedNode))
+
+        for index in range(len(previous) - 1):
+            spurNode = previous[index]
+            root = previous[:index + 1]
+            #Leave the root by any edge the paths found so far don't use,
+            #and never go back through the root
+            bannedEdges = {path[index + 1] for path in found if path[:index + 1] == root}
+            bannedNodes = set(root[:-1])
+            def spurEdges(node, spurNode=spurNode, bannedEdges=bannedEdges, bannedNodes=bannedNodes):
+                return [(relatedNode, length) for relatedNode, length in edges(node)
+                        if relatedNode not in bannedNodes and not (node == spurNode and relatedNode in bannedEdges)]
+            spur = _search(spurEdges, spurNode, goal, None, None)
+            if spur is None:
+                continue
+            path = root[:-1] + spur[1]
+            if tuple(path) not in seen:
+                seen.add(tuple(path))
+                heapq.heappush(candidates, (rootCosts[index] + spur[0], next(counter), path))
+
+        if not candidates:
+            return
+        cost, order, path = heapq.heappop(candidates)
+        found.append(path)
+        yield cost, path
+
+
+#Yields every shortest path from start to goal. One Dijkstra search records,
+#for each node, every neighbour it can be reached from at its best distance,
+#then the paths are read back from the goal one at a time. With weights
+#that aren't whole numbers, paths only tie if their costs add up exactly.
+def allShortestPaths(graph, start, goal, weight=None):
+    edges = _edgesOf(graph, weight)
+    best = {start: 0}
+    previous = {start: []}
+    fringe = [(0, 0, start)]
+    counter = itertools.count(1)
+    while fringe:
+        distance, order, current = heapq.heappop(fringe)
+        if distance > best[current]:
+            continue
+        if goal in best and distance > best[goal]:
+            break
+        if current == goal:
+            continue
+        for relatedNode, length in edges(current):
+            newDistance = distance + length
+            if relatedNode not in best or newDistance < best[relatedNode]:
+                best[relatedNode] = newDistance
+                previous[relatedNode] = [current]
+                heapq.heappush(fringe, (newDistance, next(counter), relatedNode))
+            elif newDistance == best[relatedNode]:
+                previous[relatedNode].append(current)
+    if goal not in best:
+        return
+
+    #Depth first from the goal back to the start: the path so far and an
+    #iterator over the next step's choices for every node on it
+    path = [goal]
+    pending = [iter(previous[goal])]
+    while pending:
+        if path[-1] == start:
+            yield path[::-1]
+            pending.pop()
+            path.pop()
+            continue
+        step = next(pending[-1], None)
+        if step is None:
+            pending.pop()
+            path.pop()
+        else:
+            path.append(step)
+            pending.append(iter(previous[step]))
+
+
+if __name__ == "__main__":
+    from bfs import graph
+    from graphgen import gridGraph
+
+    for cost, path in itertools.islice(kShortestPaths(graph, "A", "S"), 5):
+        print(cost, path)
+    print(list(allShortestPaths(graph, "A", "S")))
+
+    #A 30 x 30 grid has C(58, 29), about 3 * 10^16, shortest corner to
+    #corner paths, so only ask for a few
+    grid, coords = gridGraph(30, 30, seed=0)
+    unweighted = grid.toDict()
+    print([len(path) for path in itertools.islice(allShortestPaths(unweighted, 0, 899), 3)])
+    for cost, path in itertools.islice(kShortestPaths(grid, 0, 899), 3):
+        print("{0:.3f} {1} nodes".format(cost, len(path)))
@@ -0,0 +1,247 @@
+"""
+Exact results for king and rook against king.
+
+generate() works out every position by retrograde analysis. A position is
+three squares (0 to 63, file + 8 * rank) and whose move it is, so there are
+2 * 64^3 of them, and the whole table is one byte each:
+
+    0 to 253    plies until white mates
+    DRAW        a draw (stalemate, or black can take the rook)
+    ILLEGAL     two pieces on one square, touching kings, or black in
+                check with white to move
+
+All moves of all positions are generated up front as arrays of successor
+indices. The analysis then runs on every position at once, one ply per
+step: white to move wins in p plies if some move reaches a black position
+lost in p - 1, and black to move loses in p if every move reaches a white
+win (the longest being p - 1). That takes a few dozen vectorized steps, so
+the whole table is built in a second or two, and a lookup is one index
+into a 512 KB array.
+
+datasets/chess.csv has black to move, and its result is the number of
+white moves to mate as a word ("zero" to "sixteen") or "draw"; result()
+and labels() answer in the same words.
+"""
+import os
+
+import numpy as np
+
+DRAW = 255
+ILLEGAL = 254
+NUM_POSITIONS = 64 ** 3
+LABELS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+          "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen"]
+
+KING_STEPS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+def square(file, rank):
+    #"a" to "h" (or 0 to 7) and 1 to 8 -> 0 to 63
+    if isinstance(file, str):
+        file = ord(file) - ord("a")
+    return file + 8 * (rank - 1)
+
+
+def index(whiteKing, whiteRook, blackKing, whiteToMove=False):
+    return (0 if whiteToMove else NUM_POSITIONS) + (whiteKing * 64 + whiteRook) * 64 + blackKing
+
+
+def _attacked(rook, target, blocker):
+    #True where the rook attacks target along a file or rank that blocker
+    #isn't standing in the middle of
+    rookFile, rookRank = rook % 8, rook // 8
+    targetFile, targetRank = target % 8, target // 8
+    blockerFile, blockerRank = blocker % 8, blocker // 8
+    sameFile = (rookFile == targetFile) & (rookRank != targetRank)
+    sameRank = (rookRank == targetRank) & (rookFile != targetFile)
+    betweenOnFile = (blockerFile == rookFile) & (np.minimum(rookRank, targetRank) < blockerRank) & \
+                    (blockerRank < np.maximum(rookRank, targetRank))
+    betweenOnRank = (blockerRank == rookRank) & (np.minimum(rookFile, targetFile) < blockerFile) & \
+                    (blockerFile < np.maximum(rookFile, targetFile))
+    return (sameFile & ~betweenOnFile) | (sameRank & ~betweenOnRank)
+
+
+def _touching(first, second):
+    return np.maximum(np.abs(first % 8 - second % 8), np.abs(first // 8 - second // 8)) <= 1
+
+
+def _moves():
+    #Successor tables for every (whiteKing, whiteRook, blackKing), -1 where
+    #a move slot is empty
+    whiteKing, whiteRook, blackKing = (part.ravel() for part in np.indices((64, 64, 64)))
+    distinct = (whiteKing != whiteRook) & (whiteKing != blackKing) & (whiteRook != blackKing)
+    apart = distinct & ~_touching(whiteKing, blackKing)
+    check = _attacked(whiteRook, blackKing, whiteKing)
+
+    #Black: king steps to squares white doesn't cover, or takes an
+    #undefended rook, which draws
+    blackMoves = np.full((NUM_POSITIONS, len(KING_STEPS)), -1, dtype=np.int32)
+    canTake = np.zeros(NUM_POSITIONS, dtype=bool)
+    for slot, (fileStep, rankStep) in enumerate(KING_STEPS):
+        file, rank = blackKing % 8 + fileStep, blackKing // 8 + rankStep
+        onBoard = (file >= 0) & (file < 8) & (rank >= 0) & (rank < 8)
+        target = np.where(onBoard, file + 8 * rank, 0)
+        safe = onBoard & ~_touching(target, whiteKing)
+        canTake |= apart & safe & (target == whiteRook) & ~_touching(whiteRook, whiteKing)
+        valid = apart & safe & (target != whiteRook) & ~_attacked(whiteRook, target, whiteKing)
+        blackMoves[valid, slot] = index(whiteKing[valid], whiteRook[valid], target[valid], True)
+
+    #White: king steps, and rook slides until something is in the way
+    whiteMoves = np.full((NUM_POSITIONS, len(KING_STEPS) + 7 * len(ROOK_DIRECTIONS)), -1, dtype=np.int32)
+    for slot, (fileStep, rankStep) in enumerate(KING_STEPS):
+        file, rank = whiteKing % 8 + fileStep, whiteKing // 8 + rankStep
+        onBoard = (file >= 0) & (file < 8) & (rank >= 0) & (rank < 8)
+        target = np.where(onBoard, file + 8 * rank, 0)
+        valid = apart & onBoard & (target != whiteRook) & ~_touching(target, blackKing)
+        whiteMoves[valid, slot] = index(target[valid], whiteRook[valid], blackKing[valid])
+    slot = len(KING_STEPS)
+    for fileStep, rankStep in ROOK_DIRECTIONS:
+        open_ = apart.copy()
+        for distance in range(1, 8):
+            file, rank = whiteRook % 8 + fileStep * distance, whiteRook // 8 + rankStep * distance
+            target = file + 8 * rank
+            open_ &= (file >= 0) & (file < 8) & (rank >= 0) & (rank < 8) & \
+                     (target != whiteKing) & (target != blackKing)
+            whiteMoves[open_, slot] = index(whiteKing[open_], target[open_], blackKing[open_])
+            slot += 1
+
+    return apart, check, canTake, whiteMoves, blackMoves
+
+
+def generate():
+    #The whole table, white to move first and then black to move
+    apart, check, canTake, whiteMoves, blackMoves = _moves()
+    whiteLegal = apart & ~check
+    blackLegal = apart
+
+    #Plies to mate so far, -1 while unknown, white half then black half
+    plies = np.full(2 * NUM_POSITIONS, -1, dtype=np.int16)
+    white = plies[:NUM_POSITIONS]
+    black = plies[NUM_POSITIONS:]
+    hasMoves = (blackMoves >= 0).any(axis=1)
+    black[blackLegal & check & ~hasMoves & ~canTake] = 0
+    #A black position that can take the rook is a draw whatever else it does
+    blackOpen = blackLegal & ~canTake & hasMoves & (black < 0)
+    safeMoves = np.where(blackMoves >= 0, blackMoves, 0)
+
+    #Stops once a white ply and a black ply in a row found nothing new
+    ply = 0
+    idle = 0
+    while idle < 2:
+        ply += 1
+        if ply % 2:
+            #White wins if any move reaches a black loss from last ply
+            unknown = np.flatnonzero(whiteLegal & (white < 0))
+            successors = whiteMoves[unknown]
+            found = ((plies[np.where(successors >= 0, successors, 0)] == ply - 1) & (successors >= 0)).any(axis=1)
+            white[unknown[found]] = ply
+        else:
+            #Black loses once every move reaches a white win
+            unknown = np.flatnonzero(blackOpen & (black < 0))
+            successors = safeMoves[unknown]
+            found = ((plies[successors] >= 0) | (blackMoves[unknown] < 0)).all(axis=1)
+            black[unknown[found]] = ply
+        idle = 0 if found.any() else idle + 1
+
+    table = np.full(2 * NUM_POSITIONS, DRAW, dtype=np.uint8)
+    table[plies >= 0] = plies[plies >= 0]
+    table[:NUM_POSITIONS][~whiteLegal] = ILLEGAL
+    table[NUM_POSITIONS:][~blackLegal] = ILLEGAL
+    return table
+
+
+class Tablebase:
+    def __init__(self, table=None):
+        self.table = generate() if table is None else table
+
+    @classmethod
+    def load(cls, path):
+        #The file is the raw table, memory-mapped rather than read. A file
+        #of the wrong size (cut short or from something else) is refused.
+        table = np.memmap(path, dtype=np.uint8, mode="r")
+        if len(table) != 2 * NUM_POSITIONS:
+            raise ValueError("{0} holds {1} bytes, a tablebase needs {2}".format(
+                path, len(table), 2 * NUM_POSITIONS))
+        return cls(table)
+
+    @classmethod
+    def loadOrGenerate(cls, path="krk_tablebase.bin"):
+        try:
+            return cls.load(path)
+        except (FileNotFoundError, ValueError):
+            tablebase = cls()
+            tablebase.save(path)
+            return tablebase
+
+    def save(self, path):
+        #Written next to the file and renamed over it, so an interrupted
+        #save never leaves half a table behind
+        partial = path + ".tmp"
+        self.table.tofile(partial)
+        os.replace(partial, path)
+
+    def lookup(self, whiteKing, whiteRook, blackKing, whiteToMove=False):
+        #Plies to mate, DRAW or ILLEGAL
+        return int(self.table[index(whiteKing, whiteRook, blackKing, whiteToMove)])
+
+    def result(self, whiteKing, whiteRook, blackKing):
+        #The chess.csv answer for a position with black to move
+        return _label(self.lookup(whiteKing, whiteRook, blackKing))
+
+    def labels(self, df):
+        #The chess.csv answer for every row of a DataFrame with its columns
+        whiteKing = _squares(df["white_king_file"], df["white_king_rank"])
+        whiteRook = _squares(df["white_rook_file"], df["white_rook_rank"])
+        blackKing = _squares(df["black_king_file"], df["black_king_rank"])
+        values = self.table[index(whiteKing, whiteRook, blackKing)]
+        words = np.array([_label(value) for value in range(256)], dtype=object)
+        return words[values]
+
+
+def _squares(files, ranks):
+    files = np.asarray(files)
+    if files.dtype.kind in "OUS":
+        files = np.array([ord(file) - ord("a") for file in files])
+    return files.astype(np.int64) + 8 * (np.asarray(ranks, dtype=np.int64) - 1)
+
+
+def _label(value):
+    if value == DRAW:
+        return "draw"
+    if value == ILLEGAL:
+        return "illegal"
+    #Black to move, so an even number of plies: white's moves are half
+    return LABELS[value // 2] if value // 2 < len(LABELS) else str(value // 2)
+
+
+if __name__ == "__main__":
+    import time
+
+    started = time.perf_counter()
+    tablebase = Tablebase()
+    print("Generated in {0:.2f}s".format(time.perf_counter() - started))
+    tablebase.save("krk_tablebase.bin")
+
+    #The positions in chess.csv: black to move, white king on a1-d1-d4, and
+    #with the white king on the long diagonal only one of each mirror pair
+    mirror = lambda square: square // 8 + 8 * (square % 8)
+    counts = {}
+    seen = set()
+    for file in range(4):
+        for rank in range(1, file + 2):
+            whiteKing = square(file, rank)
+            for whiteRook in range(64):
+                for blackKing in range(64):
+                    value = tablebase.lookup(whiteKing, whiteRook, blackKing)
+                    if value == ILLEGAL:
+                        continue
+                    if rank == file + 1:
+                        pair = min((whiteRook, blackKing), (mirror(whiteRook), mirror(blackKing)))
+                        if (whiteKing, pair) in seen:
+                            continue
+                        seen.add((whiteKing, pair))
+                    counts[_label(value)] = counts.get(_label(value), 0) + 1
+    print(sum(counts.values()), "positions:", {label: counts.get(label, 0) for label in ["draw"] + LABELS})
+    print("Longest win: {0} plies".format(int(tablebase.table[tablebase.table < ILLEGAL].max())))
+    print(tablebase.result(square("a", 1), square("b", 2), square("c", 8)))
@@ -0,0 +1,198 @@
+"""
+Fast repeated shortest path queries on a graph that rarely changes.
+
+PathOracle picks K landmark nodes and stores the BFS distance from each of
+them to every node in a (nodes x K) uint32 array. For an undirected graph the
+triangle inequality turns those into bounds on any distance:
+
+    lower = max over landmarks of |d(L, start) - d(L, goal)|
+    upper = min over landmarks of d(L, start) + d(L, goal)
+
+so bounds() answers straight from the table, and shortestPath() runs an A*
+search that uses the lower bound as its heuristic (the ALT algorithm). Paths
+it has found are kept in an LRU cache, so a hot query costs one dict lookup.
+Paths come back as tuples, so a caller can't change the cached copy.
+Changing the graph through addEdge()/removeEdge() (or calling invalidate()
+after changing it yourself) clears the cache and the landmarks are rebuilt
+on the next query.
+"""
+import heapq
+from collections import OrderedDict
+
+import numpy as np
+
+from csrgraph import CSRGraph
+
+#Hop counts are int32 (node ids are), so any of them fits below this
+UNREACHABLE = np.iinfo(np.uint32).max
+
+
+class PathOracle:
+    def __init__(self, graph, numLandmarks=8, cacheSize=10000, seed=None):
+        self.graph = graph
+        self.numLandmarks = numLandmarks
+        self.cacheSize = cacheSize
+        self.rng = np.random.default_rng(seed)
+        self.cache = OrderedDict()
+        self.csr = None
+        self.distances = None
+        self.landmarks = None
+
+    def invalidate(self):
+        #Call after changing the graph behind the oracle's back
+        self.cache.clear()
+        self.csr = None
+        self.distances = None
+
+    def addEdge(self, first, second):
+        #Adds an undirected edge to a dict graph
+        if isinstance(self.graph, CSRGraph):
+            raise TypeError("CSRGraph can't be changed, build a new oracle")
+        for node, other in ((first, second), (second, first)):
+            neighbours = self.graph.setdefault(node, [])
+            if other not in neighbours:
+                neighbours.append(other)
+        self.invalidate()
+
+    def removeEdge(self, first, second):
+        if isinstance(self.graph, CSRGraph):
+            raise TypeError("CSRGraph can't be changed, build a new oracle")
+        for node, other in ((first, second), (second, first)):
+            if other in self.graph.get(node, ()):
+                self.graph[node].remove(other)
+        self.invalidate()
+
+    def _build(self):
+        csr = self.graph if isinstance(self.graph, CSRGraph) else CSRGraph.fromDict(self.graph)
+        numLandmarks = min(self.numLandmarks, csr.numNodes)
+        distances = np.full((csr.numNodes, numLandmarks), UNREACHABLE, dtype=np.uint32)
+        #Farthest first: every new landmark is the node farthest from the
+        #ones picked so far, which spreads them around the edge of the graph
+        closest = np.full(csr.numNodes, -1, dtype=np.int64)
+        landmark = int(self.rng.integers(csr.numNodes))
+        landmarks = []
+        for index in range(numLandmarks):
+            landmarks.append(landmark)
+            hops = csr.distancesFrom(landmark)
+            reached = hops >= 0
+            distances[reached, index] = hops[reached]
+            closest = np.where(closest < 0, hops, np.where(reached, np.minimum(closest, hops), closest))
+            landmark = int(np.argmax(closest))
+        self.csr = csr
+        self.distances = distances
+        self.landmarks = [csr.labelOf(node) for node in landmarks]
+
+    def _ready(self):
+        if self.distances is None:
+            self._build()
+        return self.csr
+
+    def _boundsIds(self, start, goal):
+        first = self.distances[start].astype(np.int64)
+        second = self.distances[goal].astype(np.int64)
+        firstReached = first != UNREACHABLE
+        secondReached = second != UNREACHABLE
+        #A landmark that reaches only one of them splits the graph between them
+        if (firstReached != secondReached).any():
+            return float("inf"), float("inf")
+        both = firstReached & secondReached
+        if not both.any():
+            return 0, float("inf")
+        lower = int(np.abs(first[both] - second[both]).max())
+        upper = int((first[both] + second[both]).min())
+        return lower, upper
+
+    def bounds(self, start, goal):
+        #(lower, upper) bounds on the number of steps from start to goal
+        csr = self._ready()
+        return self._boundsIds(csr.idOf(start), csr.idOf(goal))
+
+    def shortestPath(self, start, goal, stats=None):
+        key = (start, goal)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        csr = self._ready()
+        startId = csr.idOf(start)
+        goalId = csr.idOf(goal)
+        if self._boundsIds(startId, goalId)[0] == float("inf"):
+            path = None
+        else:
+            path = self._search(csr, startId, goalId, stats)
+            if path is not None:
+                path = tuple(csr.labelOf(node) for node in path)
+
+        self.cache[key] = path
+        if len(self.cache) > self.cacheSize:
+            self.cache.popitem(last=False)
+        return path
+
+    def _search(self, csr, start, goal, stats):
+        #A* with the landmark lower bound, every edge costs 1. The heuristic
+        #is worked out for all of a node's neighbours in one go, and ties on
+        #the estimate go to the deeper node, which is closer to the goal.
+        usable = self.distances[goal] != UNREACHABLE
+        distances = self.distances[:, usable].astype(np.int32)
+        goalRow = distances[goal]
+
+        offsets = csr.offsets
+        targets = csr.targets
+        parent = {start: None}
+        steps = {start: 0}
+        fringe = [(0, 0, start)]
+        expanded = 0
+        while fringe:
+            guess, negativeTaken, current = heapq.heappop(fringe)
+            taken = -negativeTaken
+            if taken > steps[current]:
+                continue
+            if current == goal:
+                break
+            expanded += 1
+            neighbors = targets[offsets[current]:offsets[current + 1]]
+            if not len(neighbors):
+                continue
+            if len(goalRow):
+                estimates = np.abs(distances[neighbors] - goalRow).max(axis=1).tolist()
+            else:
+                estimates = [0] * len(neighbors)
+            for relatedNode, estimate in zip(neighbors.tolist(), estimates):
+                if relatedNode not in steps or taken + 1 < steps[relatedNode]:
+                    steps[relatedNode] = taken + 1
+                    parent[relatedNode] = current
+                    heapq.heappush(fringe, (taken + 1 + estimate, -(taken + 1), relatedNode))
+        if stats is not None:
+            stats["expanded"] = stats.get("expanded", 0) + expanded
+        if goal not in parent:
+            return None
+        path = [goal]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    from bfs import bfsShortestPath
+    from graphgen import randomGraph
+
+    graph = randomGraph(200000, 8, seed=0)
+    started = time.perf_counter()
+    oracle = PathOracle(graph, numLandmarks=16, seed=0)
+    oracle.bounds(0, 1)
+    print("Landmarks built in {0:.2f}s".format(time.perf_counter() - started))
+
+    rng = random.Random(0)
+    queries = [(rng.randrange(graph.numNodes), rng.randrange(graph.numNodes)) for query in range(50)]
+    for name, search in (("bfs", lambda start, goal, stats: bfsShortestPath(graph, start, goal, stats)),
+                         ("alt", oracle.shortestPath),
+                         ("cached", oracle.shortestPath)):
+        stats = {}
+        started = time.perf_counter()
+        for start, goal in queries:
+            search(start, goal, stats)
+        print("{0}: {1:.0f} nodes expanded, {2:.3f} ms per query".format(
+            name, stats.get("expanded", 0) / len(queries), (time.perf_counter() - started) / len(queries) * 1000))
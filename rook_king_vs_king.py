@@ -40,16 +40,29 @@ from sklearn.model_selection import cross_val_score
 
 from sklearn.model_selection import GridSearchCV
 
+# Exact results for every position, worked out by krk_tablebase.py
+from krk_tablebase import Tablebase
+
+# Symmetry-canonical uint8 encoding of the positions
+from chess_encoding import encodeFrame
+
+# Array version of a fitted tree for fast batch scoring
+from treecompile import CompiledTree
+
 dataset = "datasets/chess.csv"
 
 df = pd.read_csv(dataset)
+raw_df = df
 
+# Answer from the tablebase instead of the classifier wherever it can
+use_tablebase = True
 
-columns_to_encode = ['white_king_file', 'white_rook_file', 'black_king_file']
 y_value = "result"
 
-
-df = pd.get_dummies(data=df, columns=columns_to_encode)
+# Instead of one-hot columns from pd.get_dummies, every position becomes the
+# file and rank of each piece (uint8) after turning and mirroring the board
+# into one standard orientation, and repeated positions are dropped
+df = encodeFrame(df)
 df = df.sample(frac=1)
 
 n_samples = df.shape[0]
@@ -143,6 +156,26 @@ test_acc = classifier.score(test_X, test_y)
 print("Train:", train_acc)
 print("Test", test_acc)
 
+# Flatten the fitted tree into plain arrays for scoring big batches of
+# positions without sklearn, load it back with CompiledTree.load()
+compiled = CompiledTree.fromModel(classifier)
+compiled.save("chess_tree.npy")
+print("Compiled tree agrees", np.mean(compiled.predict(test_X) == classifier.predict(test_X)))
+
+if use_tablebase:
+    tablebase = Tablebase.loadOrGenerate()
+    exact_y = tablebase.labels(raw_df.loc[test_X.index])
+    print("Tablebase", np.mean(exact_y == test_y.to_numpy()))
+
+    # The tree's leaves are all pure, so its confidence can't tell us when it's
+    # wrong. The tablebase is exact, so use it for every legal position and
+    # keep the classifier's guess only for rows it can't place.
+    predictions = classifier.predict(test_X)
+    known = exact_y != "illegal"
+    predictions = np.where(known, exact_y, predictions)
+    print("Test with tablebase fallback ({0} of {1} rows)".format(known.sum(), len(known)),
+          np.mean(predictions == test_y.to_numpy()))
+
 
 # Create confusion matrix
 '''
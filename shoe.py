@@ -0,0 +1,58 @@
+"""
+A multi-deck blackjack shoe.
+
+The cards live in a compact array of small integers with a read cursor, so
+drawing a card is O(1) and the shoe never grows however many rounds are
+played. Once the cursor passes the cut card the shoe should be reshuffled
+before the next round, and it reshuffles by itself if it ever runs dry.
+"""
+import random
+from array import array
+
+# One suit for game.py: 2 to 9, four cards worth 10 and an ace worth 11
+GAME_SUIT = (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11)
+# real.py also puts an ace worth 1 in every suit
+REAL_SUIT = GAME_SUIT + (1,)
+
+
+class Shoe:
+    #numDecks is how many decks are mixed together
+    #suit is the card values of one suit, a deck is four of them
+    #penetration is how far into the shoe the cut card sits
+    def __init__(self, numDecks=1, suit=GAME_SUIT, penetration=0.75, rng=random):
+        if numDecks < 1:
+            raise ValueError("A shoe needs at least one deck")
+        if not 0 < penetration <= 1:
+            raise ValueError("Penetration must be in (0, 1]")
+        self.cards = array("b", suit * 4 * numDecks)
+        self.cutCard = max(1, int(len(self.cards) * penetration))
+        self.rng = rng
+        self.cursor = 0
+        self.shuffle()
+
+    def shuffle(self):
+        #Fisher-Yates in place, the same walk as shuffle() used in game.py
+        #random() is far cheaper than randint() and a 53 bit float has no
+        #bias worth worrying about over a few hundred cards
+        cards = self.cards
+        size = len(cards)
+        uniform = self.rng.random
+        for write_index in range(size - 1):
+            read_index = write_index + int(uniform() * (size - write_index))
+            cards[read_index], cards[write_index] = cards[write_index], cards[read_index]
+        self.cursor = 0
+
+    def needsShuffle(self):
+        #True once the cut card has come out
+        return self.cursor >= self.cutCard
+
+    def drawCard(self):
+        if self.cursor == len(self.cards):
+            self.shuffle()
+        card = self.cards[self.cursor]
+        self.cursor += 1
+        return card
+
+    def __len__(self):
+        #Cards left before the shoe runs dry
+        return len(self.cards) - self.cursor
@@ -0,0 +1,148 @@
+"""
+Whole-graph BFS as sparse matrix products.
+
+SparseBFS keeps the graph as a SciPy CSR adjacency matrix A, where A[i, j]
+is True for an edge i -> j. A BFS level is then one product: if F marks the
+nodes reached last level, F @ A marks everything one step further, and the
+nodes seen before are masked out.
+
+Many sources run in the same pass. Each node holds a 64 bit word whose bit s
+says source s has reached it, and the product is done in the (or, and)
+semiring: a node's next word is the OR of the words of the nodes with an
+edge into it, which for every node at once is one gather and one
+np.bitwise_or.reduceat over the rows of A transposed. So a level costs one
+sweep over the edges for 64 sources instead of one per source. That is what
+distances() and eccentricity() are built on; components() leaves the
+labelling to scipy.sparse.csgraph.
+
+Results are arrays indexed by node id (the order of graph.labels for a
+CSRGraph), with -1 for nodes that can't be reached.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+from csrgraph import CSRGraph
+
+#Sources that share one pass, one per bit of a word
+WORD_BITS = 64
+
+
+class SparseBFS:
+    def __init__(self, graph):
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.fromDict(graph)
+        self.graph = graph
+        numNodes = graph.numNodes
+        self.matrix = sparse.csr_array(
+            (np.ones(graph.numEdges, dtype=bool), graph.targets, graph.offsets), shape=(numNodes, numNodes))
+        #Row j of the transpose lists the nodes with an edge into j
+        self.reverse = self.matrix.T.tocsr()
+        starts = self.reverse.indptr[:-1]
+        self._hasEdges = starts < self.reverse.indptr[1:]
+        self._starts = starts[self._hasEdges]
+
+    @property
+    def numNodes(self):
+        return self.graph.numNodes
+
+    def _ids(self, nodes):
+        return np.array([self.graph.idOf(node) for node in nodes], dtype=np.int64)
+
+    def _levels(self, sources):
+        #Runs a BFS from each of up to 64 source ids together and yields
+        #(level, nodes, words) for every level: the nodes first reached on
+        #it, and for each of them a word with the bits of the sources that
+        #reached it
+        seen = np.zeros(self.numNodes, dtype=np.uint64)
+        np.bitwise_or.at(seen, sources, np.left_shift(np.uint64(1), np.arange(len(sources), dtype=np.uint64)))
+        frontier = seen.copy()
+        reached = np.zeros(self.numNodes, dtype=np.uint64)
+        indices = self.reverse.indices
+        level = 0
+        yield level, sources, seen[sources]
+        while True:
+            level += 1
+            #One level for every source: OR together the words of each
+            #node's in-neighbours
+            reached[self._hasEdges] = np.bitwise_or.reduceat(frontier[indices], self._starts)
+            np.bitwise_and(reached, ~seen, out=frontier)
+            nodes = np.flatnonzero(frontier)
+            if not len(nodes):
+                return
+            seen |= frontier
+            yield level, nodes, frontier[nodes]
+
+    def distances(self, sources):
+        #Hop counts from every source to every node, one row per source
+        sources = self._ids(sources)
+        #Filled in node-major order, which keeps the writes close together
+        distance = np.full((self.numNodes, len(sources)), -1, dtype=np.int32)
+        for first in range(0, len(sources), WORD_BITS):
+            batch = sources[first:first + WORD_BITS]
+            columns = slice(first, first + len(batch))
+            for level, nodes, words in self._levels(batch):
+                #Unpack each word to one flag per source, bit s is source s
+                flags = np.unpackbits(words.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+                flags = flags[:, :len(batch)].astype(bool)
+                distance[nodes, columns] = np.where(flags, level, distance[nodes, columns])
+        return distance.T
+
+    def eccentricity(self, nodes=None):
+        #Greatest hop count from each node to anything it can reach. Only
+        #the last level each source reached anything on is kept, so this
+        #needs no (sources x nodes) array.
+        if nodes is None:
+            nodes = self.graph.labels
+        sources = self._ids(nodes)
+        result = np.zeros(len(sources), dtype=np.int32)
+        for first in range(0, len(sources), WORD_BITS):
+            batch = sources[first:first + WORD_BITS]
+            shifts = np.arange(len(batch), dtype=np.uint64)
+            for level, nodes, words in self._levels(batch):
+                active = (np.bitwise_or.reduce(words) >> shifts) & np.uint64(1)
+                result[first + np.flatnonzero(active)] = level
+        return result
+
+    def components(self):
+        #Component number of every node, ignoring edge direction, with the
+        #components numbered in order of their lowest node id. All of them
+        #are labelled in one pass in C by scipy.sparse.csgraph, not a BFS each.
+        count, label = csgraph.connected_components(self.matrix, directed=True, connection="weak")
+        #Renumber so component k is the one whose lowest node comes k-th
+        first = np.full(count, self.numNodes, dtype=np.int64)
+        np.minimum.at(first, label, np.arange(self.numNodes))
+        rank = np.empty(count, dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(count)
+        return rank[label]
+
+
+if __name__ == "__main__":
+    import time
+
+    from bfs import _bfsIds
+    from graphgen import randomGraph
+
+    graph = randomGraph(1000000, 4, seed=0)
+    engine = SparseBFS(graph)
+    sources = list(range(64))
+
+    started = time.perf_counter()
+    distance = engine.distances(sources)
+    print("64 sources in one pass: {0:.2f}s".format(time.perf_counter() - started))
+
+    started = time.perf_counter()
+    for goal in range(100, 110):
+        path = _bfsIds(graph, sources[0], goal)
+        assert (path is None and distance[0, goal] < 0) or len(path) - 1 == distance[0, goal]
+    print("One source at a time with bfs.py would take about {0:.0f}s".format(
+        (time.perf_counter() - started) / 10 * len(sources)))
+
+    started = time.perf_counter()
+    label = engine.components()
+    print("{0} components, largest {1} nodes: {2:.2f}s".format(
+        label.max() + 1, np.bincount(label).max(), time.perf_counter() - started))
+
+    started = time.perf_counter()
+    print("eccentricity of the sources:", engine.eccentricity(sources).tolist())
+    print("{0:.2f}s".format(time.perf_counter() - started))
@@ -0,0 +1,198 @@
+"""
+Fast batch scoring for the decision tree trained in rook_king_vs_king.py.
+
+compileTree() flattens a fitted DecisionTreeClassifier into plain arrays:
+
+    feature     feature each node splits on
+    threshold   go left when the feature is <= this
+    left        left child, the right child is always left + 1
+    value       class probabilities at every node
+    classes     the class labels
+
+The tree is numbered breadth first, so the two children of a split sit
+next to each other, and a leaf is its own left child with a threshold of
++inf. CompiledTree.leaves() walks the whole batch one level at a time,
+where a step is node = left[node] + (x > threshold[node]), a few NumPy
+gathers, and every few levels it drops the rows that are at a leaf. It
+scores as fast as sklearn's own predict().
+
+Forests are not compiled. Walking all the trees of a 100 tree
+RandomForestClassifier the same way was still about 1.3x slower than
+sklearn's predict(), as every level gathers from node arrays too big for
+the cache, so forests stay with sklearn.
+
+The arrays are saved as one record in a .npy file, and load() memory-maps
+it, so starting up reads nothing until the first batch. Nothing here
+imports sklearn: compileTree() only reads the fitted model's attributes.
+"""
+import numpy as np
+
+#Levels walked between dropping the rows that have reached a leaf
+LEVELS_PER_CHECK = 4
+
+
+def _breadthFirst(tree):
+    #Node order with the two children of every split next to each other
+    left = tree.children_left
+    right = tree.children_right
+    levels = []
+    frontier = np.zeros(1, dtype=np.int64)
+    while len(frontier):
+        levels.append(frontier)
+        splits = frontier[left[frontier] >= 0]
+        frontier = np.stack([left[splits], right[splits]], axis=1).ravel()
+    return np.concatenate(levels)
+
+
+def _roundDown(threshold):
+    #Largest float32 at or below each threshold, so x <= it in float32 is
+    #the same test as sklearn's float32 x <= float64 threshold
+    rounded = threshold.astype(np.float32)
+    over = rounded.astype(np.float64) > threshold
+    rounded[over] = np.nextafter(rounded[over], np.float32(-np.inf))
+    return rounded
+
+
+def compileTree(model):
+    #Returns the (1,) record CompiledTree is built on
+    if not hasattr(model, "tree_"):
+        raise TypeError("Only a single fitted decision tree can be compiled, score forests with sklearn")
+    tree = model.tree_
+    classes = np.asarray(model.classes_)
+    if classes.dtype.kind == "O":
+        classes = classes.astype(str)
+
+    order = _breadthFirst(tree)
+    newId = np.empty(tree.node_count, dtype=np.int64)
+    newId[order] = np.arange(len(order))
+    leaf = tree.children_left[order] < 0
+    feature = np.where(leaf, 0, tree.feature[order])
+    threshold = _roundDown(np.where(leaf, np.inf, tree.threshold[order]))
+    left = np.where(leaf, newId[order], newId[np.maximum(tree.children_left[order], 0)])
+    value = tree.value[order, 0, :].astype(np.float64)
+    value /= np.maximum(value.sum(axis=1, keepdims=True), np.finfo(np.float64).tiny)
+
+    numNodes = len(order)
+    dtype = np.dtype([
+        ("feature", np.int32, (numNodes,)),
+        ("threshold", np.float32, (numNodes,)),
+        ("left", np.int32, (numNodes,)),
+        ("value", np.float32, (numNodes, len(classes))),
+        ("classes", classes.dtype, (len(classes),)),
+    ])
+    bundle = np.zeros(1, dtype=dtype)
+    for name, array in (("feature", feature), ("threshold", threshold), ("left", left),
+                        ("value", value), ("classes", classes)):
+        bundle[name][0] = array
+    return bundle
+
+
+class CompiledTree:
+    def __init__(self, bundle):
+        self.bundle = bundle
+        record = bundle[0]
+        self.feature = record["feature"]
+        self.threshold = record["threshold"]
+        self.left = record["left"]
+        self.value = record["value"]
+        self.classes = record["classes"]
+        #Best class at every node, worked out on the first predict()
+        self._best = None
+
+    @classmethod
+    def fromModel(cls, model):
+        return cls(compileTree(model))
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path, mmap_mode="r"))
+
+    def save(self, path):
+        np.save(path, self.bundle)
+
+    @property
+    def numNodes(self):
+        return len(self.feature)
+
+    def leaves(self, X):
+        #Leaf node each row of X (float32) ends up in. Leaves point at
+        #themselves, so rows that got there early just stay put until the
+        #next check drops them.
+        numColumns = X.shape[1]
+        flat = X.ravel()
+        feature = self.feature
+        threshold = self.threshold
+        left = self.left
+        leaves = np.empty(len(X), dtype=np.int32)
+        rows = np.arange(len(X))
+        offsets = rows * numColumns
+        #The stored ids are int32, but NumPy converts any other index array
+        #to intp on every gather, so the walk itself keeps them as intp
+        node = np.zeros(len(X), dtype=np.intp)
+        while len(rows):
+            for level in range(LEVELS_PER_CHECK):
+                goRight = flat[offsets + feature[node]] > threshold[node]
+                node = left[node].astype(np.intp)
+                node += goRight
+            done = left[node] == node
+            leaves[rows[done]] = node[done]
+            going = ~done
+            rows, offsets, node = rows[going], offsets[going], node[going]
+        return leaves
+
+    def _chunks(self, X, chunkSize):
+        #X as float32, like sklearn compares it, in chunks that stay in cache
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        for first in range(0, len(X), chunkSize):
+            yield first, X[first:first + chunkSize]
+
+    def predictProba(self, X, chunkSize=1 << 15):
+        result = np.empty((len(X), len(self.classes)), dtype=np.float32)
+        for first, chunk in self._chunks(X, chunkSize):
+            np.take(self.value, self.leaves(chunk), axis=0, out=result[first:first + len(chunk)])
+        return result
+
+    def predict(self, X, chunkSize=1 << 15):
+        #Every leaf's answer is fixed, so skip the probabilities
+        if self._best is None:
+            self._best = np.argmax(self.value, axis=1)
+        result = np.empty(len(X), dtype=np.int64)
+        for first, chunk in self._chunks(X, chunkSize):
+            result[first:first + len(chunk)] = self._best[self.leaves(chunk)]
+        return self.classes[result]
+
+    def __repr__(self):
+        return "CompiledTree({0} nodes, {1} classes)".format(self.numNodes, len(self.classes))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import pandas as pd
+    from sklearn.tree import DecisionTreeClassifier
+
+    from chess_encoding import encodeFrame
+
+    #python treecompile.py [datasets/chess.csv]
+    df = encodeFrame(pd.read_csv(sys.argv[1] if len(sys.argv) > 1 else "datasets/chess.csv"))
+    X = df.drop("result", axis=1).to_numpy()
+    y = df["result"].to_numpy()
+    batch = np.random.default_rng(0).integers(0, 8, (1000000, X.shape[1])).astype(np.uint8)
+
+    model = DecisionTreeClassifier(criterion="entropy", max_depth=100, random_state=0).fit(X, y)
+    CompiledTree.fromModel(model).save("chess_tree.npy")
+    started = time.perf_counter()
+    compiled = CompiledTree.load("chess_tree.npy")
+    loaded = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected = model.predict(batch)
+    sklearnSeconds = time.perf_counter() - started
+    started = time.perf_counter()
+    predicted = compiled.predict(batch)
+    compiledSeconds = time.perf_counter() - started
+    print("{0}: loaded in {1:.1f} ms, 1M rows sklearn {2:.2f}s, compiled {3:.2f}s, {4:.4%} agree".format(
+        compiled, loaded * 1000, sklearnSeconds, compiledSeconds, np.mean(expected == predicted)))
+    print("proba matches:", np.allclose(compiled.predictProba(batch[:10000]), model.predict_proba(batch[:10000]),
+                                        atol=1e-6))